@@ -0,0 +1,138 @@
+"""
+Shared database engine, connection pool and session dependency for the API.
+
+All routers (and db/init_db.py) use the one engine returned by get_engine(),
+so the API process holds a single bounded pool against Postgres instead of
+one pool per module. Routers get a Session per request through the
+`get_session` FastAPI dependency:
+
+    @router.get("/soil/")
+    def get_soil(session: Session = Depends(get_session)):
+        ...
+
+Environment:
+    DATABASE_URL             database URL (see backend.config.get_database_url)
+    DB_POOL_SIZE             persistent connections kept open (default 5)
+    DB_MAX_OVERFLOW          extra connections allowed under burst load (default 10)
+    DB_POOL_TIMEOUT          seconds to wait for a free connection before failing (default 30)
+    DB_POOL_RECYCLE          seconds after which a connection is replaced (default 1800)
+    DB_STATEMENT_TIMEOUT_MS  per-statement timeout on Postgres, 0 disables (default 30000)
+"""
+import os
+import threading
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session
+
+from backend.config import get_database_url
+
+DEFAULT_POOL_SIZE = 5
+DEFAULT_MAX_OVERFLOW = 10
+DEFAULT_POOL_TIMEOUT = 30
+DEFAULT_POOL_RECYCLE = 1800
+DEFAULT_STATEMENT_TIMEOUT_MS = 30000
+
+_engine = None
+_engine_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats = {
+    'checkouts': 0,
+    'checkins': 0,
+    'connects': 0,
+    'invalidated': 0,
+    'waits': 0,
+    'wait_total_s': 0.0,
+    'wait_max_s': 0.0,
+    'timeouts': 0,
+}
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def _bump(key, amount=1):
+    with _stats_lock:
+        _stats[key] += amount
+
+
+def engine_options(url):
+    """Returns the create_engine keyword arguments for `url`."""
+    options = {
+        'pool_pre_ping': True,
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', DEFAULT_POOL_RECYCLE),
+    }
+    if url.startswith('sqlite'):
+        # SQLite pools are per-file and have no server-side statement timeout
+        return options
+    options.update(
+        pool_size=_env_int('DB_POOL_SIZE', DEFAULT_POOL_SIZE),
+        max_overflow=_env_int('DB_MAX_OVERFLOW', DEFAULT_MAX_OVERFLOW),
+        pool_timeout=_env_int('DB_POOL_TIMEOUT', DEFAULT_POOL_TIMEOUT),
+    )
+    timeout_ms = _env_int('DB_STATEMENT_TIMEOUT_MS', DEFAULT_STATEMENT_TIMEOUT_MS)
+    if url.startswith('postgresql') and timeout_ms > 0:
+        options['connect_args'] = {'options': f'-c statement_timeout={timeout_ms}'}
+    return options
+
+
+def _instrument(engine):
+    event.listen(engine, 'checkout', lambda *args: _bump('checkouts'))
+    event.listen(engine, 'checkin', lambda *args: _bump('checkins'))
+    event.listen(engine, 'connect', lambda *args: _bump('connects'))
+    event.listen(engine, 'invalidate', lambda *args: _bump('invalidated'))
+
+
+def get_engine():
+    """Returns the process-wide engine, creating it on first use."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                url = get_database_url()
+                engine = create_engine(url, **engine_options(url))
+                _instrument(engine)
+                _engine = engine
+    return _engine
+
+
+def get_session():
+    """
+    FastAPI dependency yielding a Session bound to the shared engine.
+
+    The connection is checked out up front so the time spent waiting for a
+    free pooled connection is measured (see pool_stats); a request that
+    cannot get one within DB_POOL_TIMEOUT fails with sqlalchemy's TimeoutError.
+    """
+    with Session(get_engine()) as session:
+        t0 = time.perf_counter()
+        try:
+            session.connection()
+        except PoolTimeoutError:
+            _bump('timeouts')
+            raise
+        waited = time.perf_counter() - t0
+        with _stats_lock:
+            _stats['waits'] += 1
+            _stats['wait_total_s'] += waited
+            _stats['wait_max_s'] = max(_stats['wait_max_s'], waited)
+        yield session
+
+
+def pool_stats():
+    """Returns the current pool occupancy plus cumulative checkout/wait counters."""
+    pool = get_engine().pool
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['wait_mean_s'] = stats['wait_total_s'] / stats['waits'] if stats['waits'] else 0.0
+    for key in ('wait_total_s', 'wait_max_s', 'wait_mean_s'):
+        stats[key] = round(stats[key], 6)
+    stats['pool'] = type(pool).__name__
+    for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+        method = getattr(pool, name, None)
+        if method is not None:
+            stats[name] = method()
+    return stats
@@ -0,0 +1,108 @@
+"""
+Joined modeling dataset: yield ⋈ weather ⋈ soil in one SQL query.
+
+Every yield row matching the filters is left-joined to the weather of its
+county-year and the soil of its county on the natural keys, both covered by
+the unique indexes. The aggregate "OTHER COUNTIES" rows are excluded. Along
+with the table, the endpoint reports how many rows were excluded and how
+many rows found no weather or soil match, so the UI no longer downloads
+whole-state weather to merge client-side.
+"""
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import and_, case, false, func, select
+from sqlalchemy.orm import Session
+
+from db.models import Soil, Weather, Yield
+from backend.database import get_session
+from backend.formats import FORMAT_PATTERN, STREAM_OPTIONS, stream_response
+
+router = APIRouter()
+
+# NASS aggregate pseudo-counties that are not real places
+EXCLUDED_COUNTIES = ('OTHER COUNTIES', 'OTHER (COMBINED) COUNTIES')
+
+DIAGNOSTICS_HEADER = 'X-Dataset-Diagnostics'
+
+DATASET_COLUMNS = [
+    Yield.year, Yield.state, Yield.district, Yield.county, Yield.county_ansi, Yield.crop,
+    Yield.value.label('yield'), Yield.unit,
+    Weather.avg_temp, Weather.precipitation, Weather.vp, Weather.srad, Weather.gdd,
+    Soil.ph, Soil.organic_matter, Soil.sand_pct, Soil.clay_pct,
+]
+
+
+def _yield_filters(state, crop, start_year, end_year):
+    filters = []
+    if state:
+        filters.append(Yield.state == state)
+    if crop:
+        filters.append(Yield.crop == crop)
+    if start_year:
+        filters.append(Yield.year >= start_year)
+    if end_year:
+        filters.append(Yield.year <= end_year)
+    return filters
+
+
+def _joined(query):
+    return (
+        query.select_from(Yield)
+        .outerjoin(Weather, and_(Weather.state == Yield.state, Weather.county == Yield.county,
+                                 Weather.year == Yield.year))
+        .outerjoin(Soil, and_(Soil.state == Yield.state, Soil.county == Yield.county))
+    )
+
+
+def dataset_query(state=None, crop=None, start_year=None, end_year=None, exclude_other=True):
+    """SELECT of the modeling table, ordered by county and year."""
+    query = _joined(select(*DATASET_COLUMNS)).where(*_yield_filters(state, crop, start_year, end_year))
+    if exclude_other:
+        query = query.where(Yield.county.not_in(EXCLUDED_COUNTIES))
+    return query.order_by(Yield.county, Yield.year, Yield.crop)
+
+
+def diagnostics_query(state=None, crop=None, start_year=None, end_year=None, exclude_other=True):
+    """One aggregate row: matching yield rows, excluded rows, and kept rows without weather/soil."""
+    excluded = Yield.county.in_(EXCLUDED_COUNTIES) if exclude_other else false()
+
+    def count_where(*conditions):
+        return func.coalesce(func.sum(case((and_(*conditions), 1), else_=0)), 0)
+
+    return _joined(select(
+        func.count().label('yield_rows'),
+        count_where(excluded).label('excluded_rows'),
+        count_where(~excluded, Weather.id.is_(None)).label('missing_weather'),
+        count_where(~excluded, Soil.id.is_(None)).label('missing_soil'),
+    )).where(*_yield_filters(state, crop, start_year, end_year))
+
+
+@router.get("/dataset/")
+def get_dataset(
+    state: Optional[str] = Query(None),
+    crop: Optional[str] = Query(None),
+    start_year: Optional[int] = Query(None),
+    end_year: Optional[int] = Query(None),
+    exclude_other: bool = Query(True, description="drop the OTHER (COMBINED) COUNTIES aggregate rows"),
+    fmt: str = Query('json', alias='format', pattern=FORMAT_PATTERN, description="json, ndjson, arrow or parquet"),
+    session: Session = Depends(get_session),
+):
+    """
+    Returns the yield ⋈ weather ⋈ soil modeling table plus diagnostics.
+
+    JSON responses are {"diagnostics": {...}, "rows": [...]}; NDJSON, Arrow
+    and Parquet responses carry the diagnostics as JSON in the
+    X-Dataset-Diagnostics header (Arrow and Parquet also in the schema
+    metadata). The rows are streamed as they are read.
+    """
+    filters = (state, crop, start_year, end_year, exclude_other)
+    diagnostics = {k: int(v or 0) for k, v in session.execute(diagnostics_query(*filters)).mappings().one().items()}
+    # The joins are on unique keys, so every kept yield row is exactly one output row
+    diagnostics['rows'] = diagnostics['yield_rows'] - diagnostics['excluded_rows']
+    encoded = json.dumps(diagnostics)
+    result = session.execute(dataset_query(*filters), execution_options=STREAM_OPTIONS)
+    return stream_response(result, DATASET_COLUMNS, fmt, headers={DIAGNOSTICS_HEADER: encoded},
+                           metadata={'diagnostics': encoded},
+                           json_prefix=f'{{"diagnostics": {encoded}, "rows": [', json_suffix=']}')
@@ -0,0 +1,171 @@
+"""
+Response formats for the data endpoints.
+
+`format=json` (default) returns the usual list of objects, `format=ndjson`
+one JSON object per line, `format=arrow` an Arrow IPC stream and
+`format=parquet` a Parquet file. Columnar responses are built straight from
+the SQL result in record batches, with the Arrow schema taken from the
+selected columns' SQL types, so empty or all-NULL pages keep their column
+types.
+
+Queries are executed with yield_per (a server-side cursor on Postgres) and
+read BATCH_ROWS rows at a time. Unpaged requests (no `limit`) are streamed:
+JSON, NDJSON and Arrow bodies are written batch by batch as the rows
+arrive, so memory stays flat and the first bytes go out as soon as the
+first batch is read. Paged responses and Parquet, whose footer needs the
+whole file, are rendered in one piece.
+"""
+import io
+import json
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import DateTime, Float, Integer, String
+
+from backend.pagination import next_cursor_headers
+
+FORMATS = ('json', 'ndjson', 'arrow', 'parquet')
+FORMAT_PATTERN = '^(json|ndjson|arrow|parquet)$'
+
+JSON_MEDIA_TYPE = 'application/json'
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+ARROW_MEDIA_TYPE = 'application/vnd.apache.arrow.stream'
+PARQUET_MEDIA_TYPE = 'application/vnd.apache.parquet'
+
+# Rows fetched from the cursor and encoded per batch
+BATCH_ROWS = 10000
+
+# Pass to Session.execute so results are fetched in batches (server-side cursor on Postgres)
+STREAM_OPTIONS = {'yield_per': BATCH_ROWS}
+
+
+def _arrow_type(sql_type):
+    if isinstance(sql_type, Integer):
+        return pa.int64()
+    if isinstance(sql_type, Float):
+        return pa.float64()
+    if isinstance(sql_type, DateTime):
+        return pa.timestamp('us')
+    if isinstance(sql_type, String):
+        return pa.string()
+    return None
+
+
+def arrow_schema(columns):
+    """Arrow schema for a list of selected SQLAlchemy columns."""
+    return pa.schema([pa.field(c.name, _arrow_type(c.type) or pa.string()) for c in columns])
+
+
+def _record_batches(result, schema, batch_rows):
+    for rows in result.partitions(batch_rows):
+        arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)]
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def result_to_table(result, columns, batch_rows=BATCH_ROWS):
+    """Converts a SQLAlchemy Result into an Arrow table one batch of rows at a time."""
+    schema = arrow_schema(columns)
+    return pa.Table.from_batches(list(_record_batches(result, schema, batch_rows)), schema=schema)
+
+
+def iter_arrow_stream(result, columns, metadata=None, batch_rows=BATCH_ROWS):
+    """Yields an Arrow IPC stream of a Result, one encoded record batch at a time."""
+    schema = arrow_schema(columns).with_metadata(metadata)
+    sink = io.BytesIO()
+
+    def drain():
+        data = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return data
+
+    with pa.ipc.new_stream(sink, schema) as writer:
+        yield drain()
+        for batch in _record_batches(result, schema, batch_rows):
+            writer.write_batch(batch)
+            yield drain()
+    yield drain()
+
+
+def _encode_rows(rows, names):
+    return [json.dumps(dict(zip(names, row)), default=str, separators=(',', ':')) for row in rows]
+
+
+def iter_json_rows(result, names, ndjson=False, prefix='[', suffix=']', batch_rows=BATCH_ROWS):
+    """
+    Yields a Result as a JSON array (wrapped in `prefix`/`suffix`) or as
+    NDJSON, encoding one batch of rows per chunk.
+    """
+    if not ndjson:
+        yield prefix.encode()
+    separator = ''
+    for rows in result.partitions(batch_rows):
+        encoded = _encode_rows(rows, names)
+        if ndjson:
+            yield ('\n'.join(encoded) + '\n').encode()
+        else:
+            yield (separator + ','.join(encoded)).encode()
+            separator = ','
+    if not ndjson:
+        yield suffix.encode()
+
+
+def serialize_table(table, fmt):
+    """Returns (body bytes, media type) for an Arrow table in `fmt` ('arrow' or 'parquet')."""
+    sink = io.BytesIO()
+    if fmt == 'parquet':
+        pq.write_table(table, sink)
+        return sink.getvalue(), PARQUET_MEDIA_TYPE
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue(), ARROW_MEDIA_TYPE
+
+
+def stream_response(result, columns, fmt, headers=None, metadata=None, json_prefix='[', json_suffix=']'):
+    """
+    Streams a Result in `fmt`; Parquet is rendered whole. `metadata` is
+    attached to the Arrow/Parquet schema, `json_prefix`/`json_suffix` wrap
+    the JSON array.
+    """
+    names = [c.name for c in columns]
+    if fmt in ('json', 'ndjson'):
+        body = iter_json_rows(result, names, ndjson=fmt == 'ndjson', prefix=json_prefix, suffix=json_suffix)
+        media_type = NDJSON_MEDIA_TYPE if fmt == 'ndjson' else JSON_MEDIA_TYPE
+        return StreamingResponse(body, media_type=media_type, headers=headers)
+    if fmt == 'arrow':
+        return StreamingResponse(iter_arrow_stream(result, columns, metadata), media_type=ARROW_MEDIA_TYPE,
+                                 headers=headers)
+    table = result_to_table(result, columns)
+    if metadata:
+        table = table.replace_schema_metadata(metadata)
+    body, media_type = serialize_table(table, fmt)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def format_response(result, columns, fmt, response, limit):
+    """
+    Renders a query result in the requested format. Unpaged results are
+    streamed; a page is rendered whole so the X-Next-Cursor header can be
+    set when it is full.
+    """
+    # Keep headers the endpoint already set on the injected response
+    headers = dict(response.headers)
+    if limit is None:
+        return stream_response(result, columns, fmt, headers)
+    if fmt in ('json', 'ndjson'):
+        rows = result.all()
+        id_index = [c.name for c in columns].index('id')
+        headers.update(next_cursor_headers(len(rows), rows[-1][id_index] if rows else None, limit))
+        encoded = _encode_rows(rows, [c.name for c in columns])
+        if fmt == 'ndjson':
+            body, media_type = ''.join(line + '\n' for line in encoded), NDJSON_MEDIA_TYPE
+        else:
+            body, media_type = '[' + ','.join(encoded) + ']', JSON_MEDIA_TYPE
+        return Response(content=body, media_type=media_type, headers=headers)
+    table = result_to_table(result, columns)
+    last_id = table.column('id')[-1].as_py() if table.num_rows else None
+    body, media_type = serialize_table(table, fmt)
+    headers.update(next_cursor_headers(table.num_rows, last_id, limit))
+    return Response(content=body, media_type=media_type, headers=headers)
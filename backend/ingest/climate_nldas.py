@@ -1,7 +1,13 @@
 
+import io
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 import requests
 import pandas as pd
-import daymetpy
+from backend.ingest import http_cache
+from backend.ingest import daymet_grid
+from backend.ingest.instrumentation import timer
+from backend.ingest.counties import get_county_cache
+from backend.ingest.weather_features import add_date_columns, annual_growing_season_features
 
 def psa_fetch_and_transform_weather(county_name, state_name, start_year, end_year):
     """
@@ -21,9 +27,8 @@ def psa_fetch_and_transform_weather(county_name, state_name, start_year, end_yea
             "output": "csv",
             "gddbase": "10"
         }
-        response = requests.get(psa_weather_url, params=params)
+        response = http_cache.get('psa', psa_weather_url, params=params)
         if response.status_code == 200:
-            import io
             csv_data = pd.read_csv(io.StringIO(response.text))
             csv_data['Year'] = year
             if county_name is not None:
@@ -69,19 +74,27 @@ if __name__ == "__main__":
     args = parser.parse_args()
     engine = create_engine(args.db)
     annual_df = fetch_and_transform_weather(args.county, args.state, args.start_year, args.end_year)
+    daily_df = None
     if isinstance(annual_df, tuple):
-        annual_df = annual_df[0]
+        annual_df, daily_df = annual_df
     from backend.ingest.runner import upsert_weather_to_db
+    from backend.ingest.weather_store import write_daily_weather
+    write_daily_weather(daily_df)
     upsert_weather_to_db(annual_df, engine)
 
 
 def get_county_bbox(county_name, state_name):
     """
-    Queries the USDA SDM API to get the bounding box for a specific county.
+    Gets the bounding box for a specific county from the local county cache,
+    falling back to a USDA SDM query when the county is not cached.
     
     Returns:
         A tuple of (min_lon, min_lat, max_lon, max_lat) or None if not found.
     """
+    entry = _cached_county(county_name, state_name)
+    if entry is not None:
+        return (entry['min_lon'], entry['min_lat'], entry['max_lon'], entry['max_lat'])
+
     print(f"Fetching bounding box for {county_name}, {state_name}...")
     sdm_api_url = "https://sdmdataaccess.nrcs.usda.gov/tabular/post.rest"
     
@@ -93,7 +106,8 @@ def get_county_bbox(county_name, state_name):
     """
     
     try:
-        response = requests.post(sdm_api_url, data={"FORMAT": "JSON", "QUERY": query})
+        with timer('sdm.bbox.fetch'):
+            response = http_cache.post('sdm', sdm_api_url, data={"FORMAT": "JSON", "QUERY": query})
         response.raise_for_status()
         if 'Table' not in response.json():
             print(f"  - Bounding box not found for {county_name}.")
@@ -108,13 +122,24 @@ def get_county_bbox(county_name, state_name):
         # The result is a list of lists, data is in the second list
         coords = data[0]
         # Convert string results to floats
-        bbox = tuple(float(c) for c in coords)
+        min_lon, min_lat, max_lon, max_lat = (float(c) for c in coords)
         
-        return bbox # (min_lon, min_lat, max_lon, max_lat)
+        return (min_lon, min_lat, max_lon, max_lat)
 
     except requests.exceptions.RequestException as e:
         print(f"  - Error fetching bounding box: {e}")
         return None
+    except (ValueError, TypeError, KeyError, IndexError) as e:
+        print(f"  - Unusable bounding box for {county_name}: {e}")
+        return None
+
+def _cached_county(county_name, state_name):
+    """Looks a county up in the local county cache; returns None on a miss or if the cache is unavailable."""
+    try:
+        return get_county_cache().get(county_name, state_name)
+    except Exception as e:
+        print(f"  - County cache unavailable ({e}); falling back to SDM.")
+        return None
 
 def get_county_center_coord(county_name, state_name):
     """
@@ -123,6 +148,10 @@ def get_county_center_coord(county_name, state_name):
     Returns:
         A dictionary {'lat': latitude, 'lon': longitude} or None if not found.
     """
+    entry = _cached_county(county_name, state_name)
+    if entry is not None:
+        return {'lat': entry['center_lat'], 'lon': entry['center_lon']}
+
     # First, get the bounding box using the existing function
     bbox = get_county_bbox(county_name, state_name)
     
@@ -142,57 +171,149 @@ def get_county_center_coord(county_name, state_name):
         return None
 
 
-def fetch_and_transform_weather(county_name, state_name, start_year, end_year):
-    lon_lat = get_county_center_coord(county_name, state_name)
-    if lon_lat is None:
-        print(f"  - Cannot fetch Daymet data without coordinates for {county_name}.")
-        return None, None
-    lon, lat = lon_lat['lon'], lon_lat['lat']
-    
-    print(f"Fetching Daymet weather data for {county_name}, {state_name} from {start_year} to {end_year}...")
-    
-    all_years_weather = []
+DAYMET_TIMESERIES_URL = "https://daymet.ornl.gov/single-pixel/api/data"
+DAYMET_VARS = "tmax,tmin,dayl,prcp,srad,swe,vp"
 
-    try:
-        all_daily_weather = daymetpy.daymet_timeseries(lon=lon, lat=lat, start_year=start_year, end_year=end_year)
-    except Exception as e:
-        print(f"  - Error fetching Daymet data: {e}")
-        return None, None
-    
-    # name first column and convert to datetime
-    all_daily_weather.rename(columns={'year': 'Year', 'yday': 'DayOfYear'}, inplace=True)
-    all_daily_weather['date'] = pd.to_datetime(all_daily_weather[['Year', 'DayOfYear']].astype(str).agg('-'.join, axis=1), format='%Y-%j')
 
-    if all_daily_weather is None or all_daily_weather.empty:
-        print(f"  - No Daymet data found for {county_name}.")
-        return None, None
-    
-    # extract year from date
-    all_daily_weather['Year'] = all_daily_weather['date'].dt.year
-    all_daily_weather['County'] = county_name
+def fetch_daymet_timeseries(lat, lon, start_year, end_year):
+    """
+    Downloads a Daymet single-pixel daily timeseries through the shared HTTP
+    cache. Returns a DataFrame shaped like daymetpy.daymet_timeseries
+    (columns year, yday, dayl, prcp, srad, swe, tmax, tmin, vp).
+    """
+    params = {
+        'lat': lat,
+        'lon': lon,
+        'vars': DAYMET_VARS,
+        'year': ",".join(str(y) for y in range(start_year, end_year + 1)),
+    }
+    with timer('daymet.fetch') as span:
+        response = http_cache.get('daymet', DAYMET_TIMESERIES_URL, params=params)
+        response.raise_for_status()
+        span.bytes = len(response.content)
+    text = response.text
+    # Skip the metadata preamble (latitude, tile, elevation, ...) up to the header row
+    header_at = text.find('year,yday')
+    if header_at < 0:
+        raise ValueError("Requested location is outside Daymet coverage (no data table in response)")
+    df = pd.read_csv(io.StringIO(text[header_at:]))
+    df.columns = [c[:c.index('(')].strip() if '(' in c else c for c in df.columns]
+    return df
 
-    for year in range(start_year, end_year + 1):
-        yearly_data = all_daily_weather[all_daily_weather['Year'] == year]
-        if yearly_data.empty:
-            print(f"  - No Daymet data for {county_name} in {year}.")
+
+def _daily_for_county(raw_df, county_name, state_name, start_year, end_year):
+    """Turns one pixel's raw Daymet frame into a county's (annual_df, daily_df)."""
+    daily_df = raw_df.rename(columns={'year': 'Year', 'yday': 'DayOfYear'}).reset_index(drop=True)
+    # derive date/month arithmetically from year + day-of-year
+    add_date_columns(daily_df)
+    daily_df['County'] = county_name
+    daily_df['State'] = state_name
+    annual_df = summarize_daily_weather(daily_df, county_name, state_name, start_year, end_year)
+    return annual_df, daily_df
+
+
+def iter_weather_for_counties(counties, start_year, end_year, max_workers=4, limiter=None):
+    """
+    Batched Daymet fetch for many counties over one year range.
+
+    Each county centroid is snapped to its Daymet 1 km cell and every distinct
+    cell is downloaded once (at the cell center, so the HTTP cache key is the
+    same on every run), `max_workers` cells at a time, each inside `limiter`'s
+    slot when given. Results are fanned back out to the counties in that cell.
+
+    Yields ((county, state), annual_df, daily_df) as cells complete, with
+    (None, None) for counties that could not be fetched and an empty
+    annual_df when Daymet has no data for the range. Only about
+    2 * max_workers cells are held in memory at once.
+    """
+    by_pixel = {}
+    for county_name, state_name in counties:
+        try:
+            lon_lat = get_county_center_coord(county_name, state_name)
+        except Exception as e:
+            # One county's bad coordinates must not abort the other counties' fetches
+            print(f"  - Failed to look up coordinates for {county_name}, {state_name}: {e}")
+            lon_lat = None
+        if lon_lat is None:
+            print(f"  - Cannot fetch Daymet data without coordinates for {county_name}.")
+            yield (county_name, state_name), None, None
             continue
-        
-        # --- Feature Engineering ---
-        growing_season = yearly_data[yearly_data['date'].dt.month.between(5, 9)]
-        t_avg = (growing_season['tmax'] + growing_season['tmin']) / 2
-        gdd = (t_avg - 10).clip(lower=0)  # GDD can't be negative
-        annual_features = {
-            'Year': year,
-            'TotalPrecip_mm': growing_season['prcp'].sum(),
-            'AvgTemp_C': t_avg.mean()   ,
-            'TotalGDD': gdd.sum(),
-            'County': county_name,
-            'State': state_name,
-            'vp': growing_season['vp'].mean(),  # Vapor pressure
-            'srad': growing_season['srad'].mean()  # Solar radiation
-            
-        }
-        all_years_weather.append(annual_features)
+        pixel = daymet_grid.snap_to_pixel(lon_lat['lat'], lon_lat['lon'])
+        by_pixel.setdefault(pixel, []).append((county_name, state_name))
+    if not by_pixel:
+        return
+    print(f"Fetching Daymet weather data for {sum(len(c) for c in by_pixel.values())} counties "
+          f"({len(by_pixel)} unique pixels) from {start_year} to {end_year}...")
+
+    def fetch(pixel):
+        lat, lon = daymet_grid.pixel_center(*pixel)
+        if limiter is None:
+            return fetch_daymet_timeseries(lat=lat, lon=lon, start_year=start_year, end_year=end_year)
+        with limiter.slot():
+            return fetch_daymet_timeseries(lat=lat, lon=lon, start_year=start_year, end_year=end_year)
+
+    pixels = iter(by_pixel)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {}
+
+        def submit_next():
+            pixel = next(pixels, None)
+            if pixel is not None:
+                futures[pool.submit(fetch, pixel)] = pixel
+
+        for _ in range(2 * max_workers):
+            submit_next()
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                pixel = futures.pop(future)
+                submit_next()
+                try:
+                    raw_df = future.result()
+                except Exception as e:
+                    print(f"  - Error fetching Daymet data for pixel {pixel}: {e}")
+                    raw_df = None
+                for county_name, state_name in by_pixel[pixel]:
+                    if raw_df is None:
+                        yield (county_name, state_name), None, None
+                        continue
+                    if raw_df.empty:
+                        print(f"  - No Daymet data found for {county_name}.")
+                        yield (county_name, state_name), pd.DataFrame(), None
+                        continue
+                    annual_df, daily_df = _daily_for_county(raw_df, county_name, state_name, start_year, end_year)
+                    yield (county_name, state_name), annual_df, daily_df
+
+
+def fetch_weather_for_counties(counties, start_year, end_year, max_workers=4, limiter=None):
+    """Collects iter_weather_for_counties() into {(county, state): (annual_df, daily_df)}."""
+    return {key: (annual_df, daily_df) for key, annual_df, daily_df
+            in iter_weather_for_counties(counties, start_year, end_year, max_workers, limiter)}
+
+
+def fetch_and_transform_weather(county_name, state_name, start_year, end_year):
+    """Fetches one county's Daymet weather; returns (annual_df, daily_df) or (None, None)."""
+    results = fetch_weather_for_counties([(county_name, state_name)], start_year, end_year, max_workers=1)
+    annual_df, daily_df = results[(county_name, state_name)]
+    if annual_df is None or annual_df.empty:
+        return None, None
     print("Daymet weather data processing complete. ✅")
-    annual_df = pd.DataFrame(all_years_weather)
-    return annual_df, all_daily_weather
\ No newline at end of file
+    return annual_df, daily_df
+
+
+def summarize_daily_weather(daily_df, county_name, state_name, start_year, end_year):
+    """
+    Aggregates one county's daily Daymet rows into annual growing-season
+    features for start_year..end_year. See weather_features for the
+    vectorized engine that handles many counties at once.
+    """
+    with timer('weather.transform') as span:
+        in_range = daily_df[daily_df['Year'].between(start_year, end_year)].copy()
+        in_range['County'] = county_name
+        in_range['State'] = state_name
+        annual_df = annual_growing_season_features(in_range)
+        span.rows = len(in_range)
+    missing = sorted(set(range(start_year, end_year + 1)) - set(annual_df['Year']))
+    if missing:
+        print(f"  - No Daymet data for {county_name} in {', '.join(map(str, missing))}.")
+    return annual_df
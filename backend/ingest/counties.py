@@ -0,0 +1,154 @@
+"""
+Local county dimension cache.
+
+The SDM `sacatalog` survey-area geometry (bounding box, centroid, state) never
+changes between runs, so it is pulled once in bulk into the `counties` table
+and served from an in-memory dict afterwards. Lookups are keyed on the
+upper-cased (state, county) pair so 'Wake'/'WAKE' and 'North Carolina'/
+'NORTH CAROLINA' resolve to the same entry.
+"""
+import threading
+
+import pandas as pd
+from sqlalchemy import create_engine, select
+
+from backend.database import get_engine
+from backend.ingest import http_cache
+
+SDM_API_URL = "https://sdmdataaccess.nrcs.usda.gov/tabular/post.rest"
+
+
+def _key(county_name, state_name):
+    return (str(state_name).strip().upper(), str(county_name).strip().upper())
+
+
+def parse_areaname(areaname):
+    """
+    Splits an SDM areaname into (county, state).
+    Example: 'Wake County, North Carolina' -> ('Wake', 'North Carolina')
+    """
+    name, _, state = areaname.rpartition(', ')
+    if name.endswith(' County'):
+        name = name[:-len(' County')]
+    return name, state
+
+
+def fetch_county_catalog():
+    """
+    Fetches geometry for every SDM survey area in a single request.
+    Returns a DataFrame with one row per (state, county).
+    """
+    print("Fetching county catalog from SDM...")
+    query = "SELECT areasymbol, areaname, mbrminx, mbrminy, mbrmaxx, mbrmaxy FROM sacatalog"
+    response = http_cache.post('sdm', SDM_API_URL, data={"FORMAT": "JSON+COLUMNNAME", "QUERY": query})
+    response.raise_for_status()
+    data = response.json()
+    if 'Table' not in data or len(data['Table']) < 2:
+        print("  - SDM returned no survey areas.")
+        return pd.DataFrame()
+    df = pd.DataFrame(data['Table'][1:], columns=data['Table'][0])
+    parsed = df['areaname'].map(parse_areaname)
+    df['county'] = parsed.str[0]
+    df['state'] = parsed.str[1]
+    df = df.rename(columns={
+        'mbrminx': 'min_lon', 'mbrminy': 'min_lat',
+        'mbrmaxx': 'max_lon', 'mbrmaxy': 'max_lat',
+    })
+    bbox_cols = ['min_lon', 'min_lat', 'max_lon', 'max_lat']
+    for col in bbox_cols:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    df = df.dropna(subset=bbox_cols)
+    df['center_lon'] = (df['min_lon'] + df['max_lon']) / 2
+    df['center_lat'] = (df['min_lat'] + df['max_lat']) / 2
+    df = df[df['state'] != ''].drop_duplicates(subset=['state', 'county'], keep='last')
+    print(f"County catalog fetched: {len(df)} survey areas. ✅")
+    return df[['state', 'county', 'areasymbol'] + bbox_cols + ['center_lon', 'center_lat']]
+
+
+def refresh_county_table(engine):
+    """Bulk-fills the counties table from one SDM catalog request. Returns rows written."""
+    from db.models import County
+    from backend.ingest.runner import _to_records, bulk_upsert
+    df = fetch_county_catalog()
+    if df.empty:
+        return 0
+    records = _to_records(df, list(df.columns))
+    return bulk_upsert(engine, County.__table__, records, key_cols=('state', 'county'), label='county')
+
+
+class CountyCache:
+    """In-memory (state, county) -> geometry map backed by the counties table."""
+
+    def __init__(self, engine=None):
+        self._engine = engine
+        self._by_key = None
+        self._by_state = None
+        self._lock = threading.Lock()
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            self._engine = get_engine()
+        return self._engine
+
+    def _load(self):
+        from db.models import County
+        with self.engine.connect() as conn:
+            rows = conn.execute(select(County.__table__)).mappings().all()
+        if not rows:
+            # First use against an empty table: fill it in bulk once
+            refresh_county_table(self.engine)
+            with self.engine.connect() as conn:
+                rows = conn.execute(select(County.__table__)).mappings().all()
+        by_key, by_state = {}, {}
+        for row in rows:
+            entry = dict(row)
+            by_key[_key(entry['county'], entry['state'])] = entry
+            by_state.setdefault(entry['state'].upper(), []).append(entry['county'])
+        self._by_key = by_key
+        self._by_state = {s: sorted(c) for s, c in by_state.items()}
+
+    def _ensure_loaded(self):
+        if self._by_key is None:
+            with self._lock:
+                if self._by_key is None:
+                    self._load()
+
+    def get(self, county_name, state_name):
+        """Returns the geometry dict for a county, or None when it is not in the catalog."""
+        self._ensure_loaded()
+        return self._by_key.get(_key(county_name, state_name))
+
+    def counties_for_state(self, state_name):
+        """Returns the sorted county names for a state."""
+        self._ensure_loaded()
+        return list(self._by_state.get(str(state_name).strip().upper(), []))
+
+    def refresh(self):
+        """Re-pulls the catalog from SDM and reloads the in-memory map."""
+        with self._lock:
+            refresh_county_table(self.engine)
+            self._load()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_county_cache():
+    """Returns the process-wide CountyCache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = CountyCache()
+    return _cache
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    parser = argparse.ArgumentParser(description="Refresh the local county geometry cache from SDM")
+    parser.add_argument('--db', default=os.environ.get("DATABASE_URL", "sqlite:///mlplayground.db"))
+    args = parser.parse_args()
+    refresh_county_table(create_engine(args.db))
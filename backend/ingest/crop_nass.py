@@ -1,59 +1,121 @@
 import os
-def fetch_and_transform_yield_csv_fallback(county_name, state_name, start_year, end_year, csv_path=None):
+import threading
+
+import pandas as pd
+
+DEFAULT_YIELD_CSV = os.path.join(os.path.dirname(__file__), '../../crop_yield_1980-2022.csv')
+
+# csv path -> (mtime, per-county index); rebuilt when the file changes on disk
+_yield_csv_cache = {}
+_yield_csv_lock = threading.Lock()
+
+
+def _load_yield_csv(csv_path):
     """
-    Filler function: Reads local CSV for North Carolina yield data and mimics the API output format.
-    Only supports North Carolina data in /crop_yield_1980_2022.csv.
+    Parses the yield CSV once into the fallback output format, keeping only
+    YIELD data items, and splits it into per-(STATE, COUNTY) frames sorted by
+    Year so each lookup is a dict hit plus a binary search on Year.
     """
-    print("[FILLER] Reading local CSV for yield data...")
-    if csv_path is None:
-        csv_path = os.path.join(os.path.dirname(__file__), '../../crop_yield_1980-2022.csv')
-    df = pd.read_csv(csv_path)
-    # Filter for county, state, year, and any Data Item that contains 'YIELD'
-    # NOTE: include all commodities (do not filter for only CORN)
-    mask = (
-        (df['State'].str.upper() == state_name.upper()) &
-        (df['County'].str.upper() == county_name.upper()) &
-        (df['Data Item'].str.contains('YIELD', case=False)) &
-        (df['Year'] >= start_year) & (df['Year'] <= end_year)
+    df = pd.read_csv(
+        csv_path,
+        usecols=['Year', 'State', 'County', 'Ag District', 'County ANSI', 'Commodity', 'Data Item', 'Value'],
+        dtype={'State': 'category', 'County': 'category', 'Commodity': 'category',
+               'Data Item': 'category', 'Ag District': 'category'},
     )
-    filtered = df[mask]
-    if filtered.empty:
-        print(f"  - No local CSV yield data found for {county_name}, {state_name}, {start_year}-{end_year}.")
-        return pd.DataFrame()
-    # Reformat to match API output and include district and county_ansi
-    out = filtered[['Year', 'Value', 'Commodity', 'Data Item', 'Ag District', 'County ANSI']].rename(columns={
-        'Year': 'Year',
+    df = df[df['Data Item'].astype(str).str.contains('YIELD', case=False)]
+    out = df.rename(columns={
         'Value': 'CropYield_bu_ac',
         'Commodity': 'Crop',
         'Data Item': 'DataItem',
         'Ag District': 'district',
         'County ANSI': 'county_ansi'
-    }).copy()
+    })
     out['CropYield_bu_ac'] = pd.to_numeric(out['CropYield_bu_ac'], errors='coerce')
-    out.dropna(subset=['CropYield_bu_ac'], inplace=True)
+    out = out.dropna(subset=['CropYield_bu_ac'])
     out['Year'] = out['Year'].astype(int)
-    out['County'] = county_name
-    out['State'] = state_name
-    # Clean up district and county_ansi (optional: convert county_ansi to string, handle NaN)
-    if 'county_ansi' in out.columns:
-        out['county_ansi'] = out['county_ansi'].astype(str).replace('nan', None)
-    if 'district' in out.columns:
-        out['district'] = out['district'].astype(str).replace('nan', None)
-    print("[FILLER] Local CSV yield data processing complete. ✅")
-    return out
+    # Clean up district and county_ansi (convert to string, keep NaN as None)
+    out['county_ansi'] = out['county_ansi'].astype(str).replace('nan', None)
+    out['district'] = out['district'].astype(object).where(out['district'].notna(), None)
+    for col in ['Crop', 'DataItem']:
+        out[col] = out[col].astype(object)
+    cols = ['Year', 'CropYield_bu_ac', 'Crop', 'DataItem', 'district', 'county_ansi']
+    index = {}
+    for (state, county), group in out.groupby(['State', 'County'], observed=True, sort=False):
+        group = group[cols].sort_values('Year', kind='stable').reset_index(drop=True)
+        group['County'] = str(county)
+        group['State'] = str(state)
+        index[(str(state).upper(), str(county).upper())] = (group, group['Year'].to_numpy())
+    return index
 
-import requests
-import pandas as pd
 
-def fetch_and_transform_yield(api_key, county_name, state_name, start_year, end_year):
+def get_yield_csv_index(csv_path=None):
     """
-    Fetches real annual corn yield data from the USDA NASS API and returns a cleaned DataFrame.
+    Returns {(STATE, COUNTY): (yield frame sorted by Year, Year array)} for the yield CSV,
+    re-parsing only when the file's mtime changes.
     """
-    print("Fetching crop yield data from USDA NASS...")
-    if api_key == 'YOUR_API_KEY' or not api_key:
-        print("  - ERROR: Please provide a valid USDA NASS API key.")
+    csv_path = os.path.abspath(csv_path or DEFAULT_YIELD_CSV)
+    mtime = os.path.getmtime(csv_path)
+    cached = _yield_csv_cache.get(csv_path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with _yield_csv_lock:
+        cached = _yield_csv_cache.get(csv_path)
+        if cached is None or cached[0] != mtime:
+            print(f"[FILLER] Parsing local yield CSV {csv_path}...")
+            cached = (mtime, _load_yield_csv(csv_path))
+            _yield_csv_cache[csv_path] = cached
+    return cached[1]
+
+
+def fetch_and_transform_yield_csv_fallback(county_name, state_name, start_year, end_year, csv_path=None):
+    """
+    Filler function: Reads local CSV for North Carolina yield data and mimics the API output format.
+    Only supports North Carolina data in /crop_yield_1980_2022.csv.
+    The CSV is parsed once per process (see get_yield_csv_index); each call is an index lookup.
+    Returns an empty DataFrame when the CSV has no rows for the county and
+    years, or None when the CSV cannot be read.
+    """
+    try:
+        index = get_yield_csv_index(csv_path)
+    except (OSError, ValueError) as e:
+        print(f"  - Failed to read local yield CSV. Error: {e}")
+        return None
+    entry = index.get((state_name.upper(), county_name.upper()))
+    if entry is not None:
+        group, years = entry
+        lo, hi = years.searchsorted(start_year, 'left'), years.searchsorted(end_year, 'right')
+        entry = group.iloc[lo:hi]
+    if entry is None or entry.empty:
+        print(f"  - No local CSV yield data found for {county_name}, {state_name}, {start_year}-{end_year}.")
         return pd.DataFrame()
-    base_url = "http://quickstats.nass.usda.gov/api/api_GET/"
+    out = entry.copy()
+    # Echo the caller's spelling of the names, as the API path does
+    if out['County'].iat[0] != county_name:
+        out['County'] = county_name
+    if out['State'].iat[0] != state_name:
+        out['State'] = state_name
+    return out
+
+import time
+from contextlib import ExitStack, nullcontext
+
+import requests
+from backend.ingest import http_cache
+from backend.ingest import instrumentation
+from backend.ingest.instrumentation import timer
+from backend.ingest.json_stream import iter_array_items
+
+NASS_API_URL = "http://quickstats.nass.usda.gov/api/api_GET/"
+NASS_COUNTS_URL = "http://quickstats.nass.usda.gov/api/get_counts/"
+# QuickStats rejects any request that would return more than this many rows
+NASS_MAX_ROWS = 50000
+# Fields kept from each QuickStats record; the other ~35 are dropped while parsing
+NASS_FIELDS = ('year', 'Value', 'commodity_desc', 'asd_desc', 'county_ansi', 'unit_desc', 'county_name')
+# Records per cleaned DataFrame when streaming a response
+NASS_BATCH_ROWS = 5000
+
+
+def _nass_params(api_key, state_name, start_year, end_year, county_name=None):
     params = {
         'key': api_key,
         'source_desc': 'SURVEY',
@@ -64,48 +126,189 @@ def fetch_and_transform_yield(api_key, county_name, state_name, start_year, end_
         'unit_desc': 'BU / ACRE',
         'agg_level_desc': 'COUNTY',
         'state_name': state_name.upper(),
-        'county_name': county_name.upper(),
         'year__LE': end_year, # API can't seem to handle the less than for year
         'year__GE': start_year,
         'format': 'JSON'
     }
-    response = requests.get(base_url, params=params)
-    if response.status_code == 200:
-        data = response.json().get('data', [])
-        if not data:
-            print("  - No yield data found for the specified parameters.")
-            return pd.DataFrame()
-        yield_df = pd.DataFrame(data)
-        # --- Data Cleaning ---
-        # Keep commodity information when present
-        if 'commodity_desc' in yield_df.columns:
-            cols = ['year', 'Value', 'commodity_desc', 'asd_desc', 'county_ansi', 'unit_desc']
-            yield_df = yield_df[[c for c in cols if c in yield_df.columns]].rename(columns={
-                'year': 'Year',
-                'Value': 'CropYield_bu_ac',
-                'commodity_desc': 'Crop',
-                'asd_desc': 'district',
-                'unit_desc': 'unit'
-            })
-        else:
-            yield_df = yield_df[['year', 'Value']].rename(columns={
-                'year': 'Year',
-                'Value': 'CropYield_bu_ac'
-            })
-        # remove thousands separators and coerce
-        if yield_df['CropYield_bu_ac'].dtype == object:
-            yield_df['CropYield_bu_ac'] = yield_df['CropYield_bu_ac'].str.replace(',', '')
-        yield_df['CropYield_bu_ac'] = pd.to_numeric(yield_df['CropYield_bu_ac'], errors='coerce')
-        yield_df.dropna(inplace=True)
-        yield_df['Year'] = yield_df['Year'].astype(int)
-        yield_df['County'] = county_name
-        yield_df['State'] = state_name
-        print("USDA NASS data processing complete. ✅")
-        return yield_df
+    if county_name is not None:
+        params['county_name'] = county_name.upper()
+    return params
+
+
+def _transform_nass_records(data):
+    """Cleans QuickStats records into the yield DataFrame format (without County/State)."""
+    with timer('nass.transform') as span:
+        yield_df = _clean_nass_records(data)
+        span.rows = len(yield_df)
+    return yield_df
+
+
+def _clean_nass_records(data):
+    yield_df = pd.DataFrame(data)
+    # --- Data Cleaning ---
+    # Keep commodity information when present
+    if 'commodity_desc' in yield_df.columns:
+        cols = ['year', 'Value', 'commodity_desc', 'asd_desc', 'county_ansi', 'unit_desc', 'county_name']
+        yield_df = yield_df[[c for c in cols if c in yield_df.columns]].rename(columns={
+            'year': 'Year',
+            'Value': 'CropYield_bu_ac',
+            'commodity_desc': 'Crop',
+            'asd_desc': 'district',
+            'unit_desc': 'unit'
+        })
     else:
-        print(f"  - Failed to get USDA data. Status: {response.status_code}")
-        print(f"  - Response: {response.text}")
+        cols = ['year', 'Value', 'county_name']
+        yield_df = yield_df[[c for c in cols if c in yield_df.columns]].rename(columns={
+            'year': 'Year',
+            'Value': 'CropYield_bu_ac'
+        })
+    # remove thousands separators and coerce
+    if not pd.api.types.is_numeric_dtype(yield_df['CropYield_bu_ac']):
+        yield_df['CropYield_bu_ac'] = yield_df['CropYield_bu_ac'].astype(str).str.replace(',', '')
+    yield_df['CropYield_bu_ac'] = pd.to_numeric(yield_df['CropYield_bu_ac'], errors='coerce')
+    yield_df.dropna(inplace=True)
+    yield_df['Year'] = yield_df['Year'].astype(int)
+    return yield_df
+
+
+def _iter_nass_batches(params, stage, batch_size=NASS_BATCH_ROWS, limiter=None):
+    """
+    Streams one QuickStats request and yields cleaned yield DataFrames of up
+    to `batch_size` rows. Records are decoded one at a time and trimmed to
+    NASS_FIELDS, so memory is bounded by the batch size, not the response size.
+    Raises requests.HTTPError for non-200 responses.
+
+    When `limiter` is given its slot is held only for the upstream request:
+    http_cache.stream() spools the body to the cache file before returning,
+    so the batches are parsed, and consumed, without holding it. With the
+    HTTP cache off the body is read from the open connection and the slot is
+    held until it is exhausted.
+    """
+    rows, parse_s = 0, 0.0
+    with ExitStack() as stack:
+        slot = ExitStack()
+        stack.callback(slot.close)
+        if limiter is not None:
+            slot.enter_context(limiter.slot())
+        body = stack.enter_context(http_cache.stream('nass', 'GET', NASS_API_URL, params=params))
+        if http_cache.get_mode() != 'off':
+            slot.close()
+        t0 = time.perf_counter()
+        batch = []
+        for record in iter_array_items(body, 'data'):
+            batch.append({k: record[k] for k in NASS_FIELDS if k in record})
+            if len(batch) >= batch_size:
+                yield_df = _transform_nass_records(batch)
+                batch = []
+                rows += len(yield_df)
+                parse_s += time.perf_counter() - t0
+                yield yield_df
+                t0 = time.perf_counter()
+        if batch:
+            yield_df = _transform_nass_records(batch)
+            rows += len(yield_df)
+            parse_s += time.perf_counter() - t0
+            yield yield_df
+        # Consumer time between batches is excluded from the span
+        instrumentation.count(stage, rows=rows, bytes=body.tell(), seconds=parse_s)
+
+
+def fetch_and_transform_yield(api_key, county_name, state_name, start_year, end_year):
+    """
+    Fetches real annual corn yield data from the USDA NASS API and returns a cleaned DataFrame.
+    Returns an empty DataFrame when NASS has no data for the parameters, or
+    None when the request failed (or the API key is missing), so callers can
+    retry the unit instead of recording it as done.
+    """
+    print("Fetching crop yield data from USDA NASS...")
+    if api_key == 'YOUR_API_KEY' or not api_key:
+        print("  - ERROR: Please provide a valid USDA NASS API key.")
+        return None
+    params = _nass_params(api_key, state_name, start_year, end_year, county_name)
+    try:
+        frames = list(_iter_nass_batches(params, 'nass.fetch'))
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"  - Failed to get USDA data. Error: {e}")
+        return None
+    if not frames:
+        print("  - No yield data found for the specified parameters.")
         return pd.DataFrame()
+    yield_df = pd.concat(frames, ignore_index=True).drop(columns=['county_name'], errors='ignore')
+    yield_df['County'] = county_name
+    yield_df['State'] = state_name
+    print("USDA NASS data processing complete. ✅")
+    return yield_df
+
+
+def get_nass_count(api_key, state_name, start_year, end_year):
+    """Returns the number of rows a statewide QuickStats query would return."""
+    params = _nass_params(api_key, state_name, start_year, end_year)
+    params.pop('format')
+    with timer('nass.count'):
+        response = http_cache.get('nass', NASS_COUNTS_URL, params=params)
+        response.raise_for_status()
+    return int(response.json().get('count', 0))
+
+
+def _split_year_range(api_key, state_name, start_year, end_year, limiter=None):
+    """
+    Splits [start_year, end_year] into sub-ranges that each stay under
+    NASS_MAX_ROWS, bisecting the range while the row count is too large.
+    """
+    with limiter.slot() if limiter is not None else nullcontext():
+        count = get_nass_count(api_key, state_name, start_year, end_year)
+    if count <= NASS_MAX_ROWS:
+        return [(start_year, end_year)] if count else []
+    if start_year == end_year:
+        print(f"  - WARNING: {state_name} {start_year} has {count} rows, over the {NASS_MAX_ROWS} row cap.")
+        return [(start_year, end_year)]
+    mid = (start_year + end_year) // 2
+    return (_split_year_range(api_key, state_name, start_year, mid, limiter)
+            + _split_year_range(api_key, state_name, mid + 1, end_year, limiter))
+
+
+def iter_yield_state_batches(api_key, state_name, start_year, end_year, batch_size=NASS_BATCH_ROWS, limiter=None):
+    """
+    Fetches county-level yields for every county of a state with statewide
+    QuickStats requests (no county_name filter) and yields them as cleaned
+    DataFrames of up to `batch_size` rows, with County taken from the
+    returned county_name and State set to `state_name`.
+
+    The year range is split automatically so no request exceeds the API's
+    50k-row cap, and each response is parsed incrementally, so callers can
+    upsert batch by batch with flat memory. Each upstream request runs inside
+    `limiter`'s slot when given, and the slot is not held while the caller
+    handles a batch. Raises requests.exceptions.RequestException or
+    ValueError on failure.
+    """
+    if api_key == 'YOUR_API_KEY' or not api_key:
+        raise ValueError("a valid USDA NASS API key is required")
+    for lo, hi in _split_year_range(api_key, state_name, start_year, end_year, limiter):
+        params = _nass_params(api_key, state_name, lo, hi)
+        for yield_df in _iter_nass_batches(params, 'nass.fetch_state', batch_size, limiter):
+            yield_df = yield_df.rename(columns={'county_name': 'County'})
+            yield_df['State'] = state_name
+            yield yield_df
+
+
+def fetch_and_transform_yield_state(api_key, state_name, start_year, end_year):
+    """
+    Collects iter_yield_state_batches() into one DataFrame (possibly empty),
+    or returns None if a request failed.
+    """
+    print(f"Fetching statewide crop yield data for {state_name} from USDA NASS...")
+    try:
+        frames = list(iter_yield_state_batches(api_key, state_name, start_year, end_year))
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"  - Failed to get statewide USDA data for {state_name}. Error: {e}")
+        return None
+    if not frames:
+        print(f"  - No yield data found for {state_name}, {start_year}-{end_year}.")
+        return pd.DataFrame()
+    yield_df = pd.concat(frames, ignore_index=True)
+    print(f"USDA NASS statewide data processing complete: {len(yield_df)} rows, "
+          f"{yield_df['County'].nunique()} counties. ✅")
+    return yield_df
 
 # Optional CLI for ingestion
 if __name__ == "__main__":
@@ -114,13 +317,16 @@ if __name__ == "__main__":
     from sqlalchemy import create_engine
     parser = argparse.ArgumentParser(description="Yield ingestion runner")
     parser.add_argument('--api_key', required=True)
-    parser.add_argument('--county', required=True)
+    parser.add_argument('--county', help="omit to fetch every county in the state")
     parser.add_argument('--state', required=True)
     parser.add_argument('--start_year', type=int, required=True)
     parser.add_argument('--end_year', type=int, required=True)
     parser.add_argument('--db', default=os.environ.get("DATABASE_URL", "sqlite:///mlplayground.db"))
     args = parser.parse_args()
     engine = create_engine(args.db)
-    yield_df = fetch_and_transform_yield(args.api_key, args.county, args.state, args.start_year, args.end_year)
+    if args.county:
+        yield_df = fetch_and_transform_yield(args.api_key, args.county, args.state, args.start_year, args.end_year)
+    else:
+        yield_df = fetch_and_transform_yield_state(args.api_key, args.state, args.start_year, args.end_year)
     from backend.ingest.runner import upsert_yield_to_db
     upsert_yield_to_db(yield_df, engine)
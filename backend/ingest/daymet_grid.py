@@ -0,0 +1,77 @@
+"""
+Daymet 1 km grid snapping.
+
+Daymet serves one time series per 1 km cell of its Lambert Conformal Conic
+grid, so any two coordinates inside the same cell return identical data.
+Snapping county centroids to their cell lets the weather fetcher request each
+distinct cell once and always with the same (cell center) coordinates, which
+also keeps the HTTP cache key stable across runs.
+
+Projection (Daymet V4): LCC on WGS84, standard parallels 25N/60N, origin
+42.5N 100W. The projection math is the ellipsoidal form from Snyder,
+"Map Projections: A Working Manual", pp. 107-109, so no pyproj is needed.
+"""
+import math
+
+import numpy as np
+
+# WGS84 ellipsoid
+_A = 6378137.0
+_F = 1 / 298.257223563
+_E = math.sqrt(2 * _F - _F ** 2)
+
+_LAT1, _LAT2, _LAT0, _LON0 = (math.radians(v) for v in (25.0, 60.0, 42.5, -100.0))
+
+# Upper-left corner of the Daymet V4 North America grid (projected meters) and cell size
+GRID_X0 = -4560750.0
+GRID_Y0 = 4984500.0
+CELL_SIZE = 1000.0
+
+
+def _m(phi):
+    return np.cos(phi) / np.sqrt(1 - (_E * np.sin(phi)) ** 2)
+
+
+def _t(phi):
+    es = _E * np.sin(phi)
+    return np.tan(np.pi / 4 - phi / 2) / ((1 - es) / (1 + es)) ** (_E / 2)
+
+
+_N = (math.log(_m(_LAT1)) - math.log(_m(_LAT2))) / (math.log(_t(_LAT1)) - math.log(_t(_LAT2)))
+_AF = _A * _m(_LAT1) / (_N * _t(_LAT1) ** _N)
+_RHO0 = _AF * _t(_LAT0) ** _N
+
+
+def to_lcc(lat, lon):
+    """Projects WGS84 degrees to Daymet LCC meters. Accepts scalars or arrays."""
+    phi = np.radians(lat)
+    theta = _N * (np.radians(lon) - _LON0)
+    rho = _AF * _t(phi) ** _N
+    return rho * np.sin(theta), _RHO0 - rho * np.cos(theta)
+
+
+def from_lcc(x, y):
+    """Inverse of to_lcc: Daymet LCC meters to WGS84 (lat, lon) degrees."""
+    x = np.asarray(x, dtype='float64')
+    dy = _RHO0 - np.asarray(y, dtype='float64')
+    rho = np.sign(_N) * np.hypot(x, dy)
+    t = (rho / _AF) ** (1 / _N)
+    lon = np.arctan2(x, dy) / _N + _LON0
+    phi = np.pi / 2 - 2 * np.arctan(t)
+    # Latitude has no closed form on the ellipsoid; converges in a handful of iterations
+    for _ in range(8):
+        es = _E * np.sin(phi)
+        phi = np.pi / 2 - 2 * np.arctan(t * ((1 - es) / (1 + es)) ** (_E / 2))
+    return np.degrees(phi), np.degrees(lon)
+
+
+def snap_to_pixel(lat, lon):
+    """Returns the (row, col) of the Daymet cell containing a WGS84 coordinate."""
+    x, y = to_lcc(lat, lon)
+    return int(math.floor((GRID_Y0 - y) / CELL_SIZE)), int(math.floor((x - GRID_X0) / CELL_SIZE))
+
+
+def pixel_center(row, col):
+    """Returns the WGS84 (lat, lon) of a Daymet cell's center, rounded to ~1 m."""
+    lat, lon = from_lcc(GRID_X0 + (col + 0.5) * CELL_SIZE, GRID_Y0 - (row + 0.5) * CELL_SIZE)
+    return round(float(lat), 5), round(float(lon), 5)
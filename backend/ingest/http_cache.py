@@ -0,0 +1,276 @@
+"""
+Shared HTTP layer for the ingest modules with an on-disk response cache.
+
+Responses are stored content-addressed under a key derived from the method,
+URL and query params/form body, so repeated development runs and the
+on-demand /yields/ path stop hitting NASS, SDM and Daymet for identical
+requests. Only 200 responses are cached. stream() serves large bodies as
+file objects read from the cache file instead of loading them into memory.
+
+Environment:
+    HTTP_CACHE_DIR             cache root (default: data/http_cache in the repo)
+    HTTP_CACHE_MODE            'default' read-through cache,
+                               'replay'  serve only from cache, never touch the network,
+                               'refresh' always fetch and overwrite the cache,
+                               'off'     no caching at all
+    HTTP_CACHE_MAX_BYTES       size bound; least recently used entries are evicted
+    HTTP_CACHE_TTL_<SOURCE>    per-source TTL in seconds, e.g. HTTP_CACHE_TTL_NASS=3600
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+
+from backend.ingest import instrumentation
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(__file__), '../../data/http_cache')
+
+# source -> TTL in seconds. NASS revises estimates; SDM and Daymet history are effectively static.
+DEFAULT_TTLS = {
+    'nass': 24 * 3600,
+    'sdm': 30 * 24 * 3600,
+    'daymet': 90 * 24 * 3600,
+    'psa': 30 * 24 * 3600,
+}
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+# Read size for streamed bodies
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Params that must not influence the cache key (secrets)
+_SECRET_PARAMS = {'key'}
+
+_evict_lock = threading.Lock()
+# Eviction walks the whole cache, so only run it every N writes
+EVICT_EVERY = 50
+_writes = 0
+_writes_lock = threading.Lock()
+
+
+class CacheMissError(requests.exceptions.RequestException):
+    """Raised in replay mode when a request has no recorded response."""
+
+
+def get_cache_dir():
+    return os.path.abspath(os.environ.get('HTTP_CACHE_DIR', DEFAULT_CACHE_DIR))
+
+
+def get_mode():
+    return os.environ.get('HTTP_CACHE_MODE', 'default').strip().lower()
+
+
+def get_ttl(source):
+    default = DEFAULT_TTLS.get(source, 24 * 3600)
+    return float(os.environ.get(f'HTTP_CACHE_TTL_{source.upper()}', default))
+
+
+def cache_key(method, url, params=None, data=None):
+    """Content address for a request: sha256 over method, URL and sorted params/body."""
+    def _norm(d):
+        if not d:
+            return []
+        items = d.items() if isinstance(d, dict) else d
+        return sorted((str(k), str(v)) for k, v in items if k not in _SECRET_PARAMS)
+    payload = json.dumps([method.upper(), url, _norm(params), _norm(data)])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _paths(key):
+    base = os.path.join(get_cache_dir(), key[:2], key)
+    return base + '.body', base + '.meta.json'
+
+
+def _lookup(key, ttl):
+    """Returns (body_path, meta) for a fresh entry, touching it for LRU bookkeeping, else None."""
+    body_path, meta_path = _paths(key)
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if ttl is not None and time.time() - meta['stored_at'] > ttl:
+            return None
+        os.utime(body_path)
+    except (OSError, ValueError, KeyError):
+        return None
+    return body_path, meta
+
+
+def _load(key, ttl):
+    entry = _lookup(key, ttl)
+    if entry is None:
+        return None
+    body_path, meta = entry
+    try:
+        with open(body_path, 'rb') as f:
+            content = f.read()
+    except OSError:
+        return None
+    response = requests.Response()
+    response.status_code = meta['status_code']
+    response.headers.update(meta.get('headers', {}))
+    response.url = meta.get('url', '')
+    response.encoding = meta.get('encoding')
+    response._content = content
+    response.from_cache = True
+    return response
+
+
+def _store(key, source, response, chunks=None):
+    """
+    Writes a cache entry for `response`; the body comes from `chunks` (an
+    iterable of bytes) when given, else from `response.content`.
+    Returns (body_path, bytes written).
+    """
+    body_path, meta_path = _paths(key)
+    os.makedirs(os.path.dirname(body_path), exist_ok=True)
+    meta = {
+        'source': source,
+        'url': response.url.split('?')[0],
+        'status_code': response.status_code,
+        'headers': {'Content-Type': response.headers.get('Content-Type', '')},
+        'encoding': response.encoding,
+        'stored_at': time.time(),
+    }
+    # Write to temp files and rename so concurrent readers never see partial entries
+    suffix = f'.{os.getpid()}.{threading.get_ident()}.tmp'
+    size = 0
+    try:
+        with open(body_path + suffix, 'wb') as f:
+            for chunk in (chunks if chunks is not None else [response.content]):
+                f.write(chunk)
+                size += len(chunk)
+        with open(meta_path + suffix, 'w') as f:
+            json.dump(meta, f)
+        os.replace(body_path + suffix, body_path)
+        os.replace(meta_path + suffix, meta_path)
+    except BaseException:
+        for p in (body_path + suffix, meta_path + suffix):
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+        raise
+    global _writes
+    # _store runs on the ingest thread pool; count under a lock so exactly one writer triggers eviction
+    with _writes_lock:
+        _writes += 1
+        due = _writes % EVICT_EVERY == 1
+    if due:
+        evict()
+    return body_path, size
+
+
+def evict(max_bytes=None):
+    """Deletes least recently used entries until the cache fits in max_bytes."""
+    max_bytes = max_bytes or int(os.environ.get('HTTP_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+    root = get_cache_dir()
+    with _evict_lock:
+        entries = []
+        total = 0
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                if not name.endswith('.body'):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        if total <= max_bytes:
+            return 0
+        removed = 0
+        for _, size, path in sorted(entries):
+            for p in (path, path[:-len('.body')] + '.meta.json'):
+                try:
+                    os.remove(p)
+                except OSError:
+                    pass
+            total -= size
+            removed += 1
+            if total <= max_bytes:
+                break
+        return removed
+
+
+def request(source, method, url, params=None, data=None, **kwargs):
+    """
+    Sends an HTTP request through the response cache for `source`.
+    Returns a requests.Response (cached ones have `from_cache = True`).
+    """
+    mode = get_mode()
+    if mode == 'off':
+        return requests.request(method, url, params=params, data=data, **kwargs)
+    key = cache_key(method, url, params, data)
+    if mode != 'refresh':
+        cached = _load(key, None if mode == 'replay' else get_ttl(source))
+        if cached is not None:
+            instrumentation.count(f'http.{source}.cache_hit', bytes=len(cached.content))
+            return cached
+    if mode == 'replay':
+        raise CacheMissError(f"No recorded {source} response for {method.upper()} {url}")
+    with instrumentation.timer(f'http.{source}.network') as span:
+        response = requests.request(method, url, params=params, data=data, **kwargs)
+        span.bytes = len(response.content)
+    if response.status_code == 200:
+        try:
+            _store(key, source, response)
+        except OSError as e:
+            print(f"  - Could not write HTTP cache entry: {e}")
+    return response
+
+
+@contextmanager
+def stream(source, method, url, params=None, data=None, **kwargs):
+    """
+    Like request(), but yields the response body as a binary file object so
+    large payloads are never held in memory whole: cache hits are read
+    straight from disk, and misses are spooled to the cache file chunk by
+    chunk before being read back. Non-200 responses raise requests.HTTPError.
+
+        with http_cache.stream('nass', 'GET', url, params=params) as body:
+            for item in iter_array_items(body, 'data'):
+                ...
+    """
+    mode = get_mode()
+    key = cache_key(method, url, params, data)
+    if mode not in ('off', 'refresh'):
+        entry = _lookup(key, None if mode == 'replay' else get_ttl(source))
+        if entry is not None:
+            with open(entry[0], 'rb') as f:
+                instrumentation.count(f'http.{source}.cache_hit', bytes=os.fstat(f.fileno()).st_size)
+                yield f
+            return
+    if mode == 'replay':
+        raise CacheMissError(f"No recorded {source} response for {method.upper()} {url}")
+    if mode != 'off':
+        try:
+            with instrumentation.timer(f'http.{source}.network') as span:
+                with requests.request(method, url, params=params, data=data, stream=True, **kwargs) as response:
+                    response.raise_for_status()
+                    body_path, span.bytes = _store(key, source, response,
+                                                   response.iter_content(STREAM_CHUNK_SIZE))
+        except requests.exceptions.RequestException:
+            raise
+        except OSError as e:
+            # Cache write failed part way through the body; fall back to an uncached read below
+            print(f"  - Could not write HTTP cache entry: {e}")
+        else:
+            with open(body_path, 'rb') as f:
+                yield f
+            return
+    with requests.request(method, url, params=params, data=data, stream=True, **kwargs) as response:
+        response.raise_for_status()
+        response.raw.decode_content = True
+        yield response.raw
+
+
+def get(source, url, params=None, **kwargs):
+    return request(source, 'GET', url, params=params, **kwargs)
+
+
+def post(source, url, data=None, **kwargs):
+    return request(source, 'POST', url, data=data, **kwargs)
@@ -0,0 +1,138 @@
+"""
+Lightweight per-stage instrumentation for the ingest pipeline.
+
+Stages are dotted names such as 'nass.fetch', 'soil.transform' or
+'db.upsert.yield'. Each timed span records its latency and, optionally, the
+rows and payload bytes it handled:
+
+    with timer('nass.fetch') as span:
+        response = http_cache.get('nass', url, params=params)
+        span.bytes = len(response.content)
+
+Spans are collected in a thread-safe process-wide registry; report() summarizes
+them per stage and write_report() dumps a JSON run report.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+DEFAULT_REPORT_DIR = os.path.join(os.path.dirname(__file__), '../../data/ingest_reports')
+
+_lock = threading.Lock()
+_spans = []
+_started_at = time.time()
+
+
+class Span:
+    """One timed unit of work; set `rows`/`bytes` inside the `timer` block."""
+
+    __slots__ = ('stage', 'rows', 'bytes', 'seconds', 'error')
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.rows = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.error = False
+
+
+@contextmanager
+def timer(stage):
+    """Times the enclosed block as one span of `stage` (errors are recorded and re-raised)."""
+    span = Span(stage)
+    t0 = time.perf_counter()
+    try:
+        yield span
+    except Exception:
+        span.error = True
+        raise
+    finally:
+        span.seconds = time.perf_counter() - t0
+        with _lock:
+            _spans.append(span)
+
+
+def count(stage, rows=0, bytes=0, seconds=0.0):
+    """Records an untimed (or externally timed) span for `stage`."""
+    span = Span(stage)
+    span.rows, span.bytes, span.seconds = rows, bytes, seconds
+    with _lock:
+        _spans.append(span)
+
+
+def reset():
+    """Clears all recorded spans and restarts the run clock."""
+    global _started_at
+    with _lock:
+        _spans.clear()
+        _started_at = time.time()
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def report():
+    """Returns {stage: {calls, errors, total_s, mean_s, p50_s, p95_s, max_s, rows, bytes}}."""
+    with _lock:
+        spans = list(_spans)
+    by_stage = {}
+    for span in spans:
+        by_stage.setdefault(span.stage, []).append(span)
+    summary = {}
+    for stage, items in sorted(by_stage.items()):
+        secs = sorted(s.seconds for s in items)
+        total = sum(secs)
+        summary[stage] = {
+            'calls': len(items),
+            'errors': sum(1 for s in items if s.error),
+            'total_s': round(total, 4),
+            'mean_s': round(total / len(items), 4),
+            'p50_s': round(_percentile(secs, 0.50), 4),
+            'p95_s': round(_percentile(secs, 0.95), 4),
+            'max_s': round(secs[-1], 4),
+            'rows': sum(s.rows for s in items),
+            'bytes': sum(s.bytes for s in items),
+        }
+    return summary
+
+
+def write_report(path=None, extra=None):
+    """
+    Writes the run report as JSON and returns its path. Defaults to
+    data/ingest_reports/run-<UTC timestamp>.json (or INGEST_REPORT_DIR).
+    """
+    finished = time.time()
+    if path is None:
+        report_dir = os.path.abspath(os.environ.get('INGEST_REPORT_DIR', DEFAULT_REPORT_DIR))
+        stamp = datetime.fromtimestamp(finished, timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        path = os.path.join(report_dir, f'run-{stamp}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    payload = {
+        'started_at': datetime.fromtimestamp(_started_at, timezone.utc).isoformat(),
+        'finished_at': datetime.fromtimestamp(finished, timezone.utc).isoformat(),
+        'wall_s': round(finished - _started_at, 3),
+        'stages': report(),
+    }
+    if extra:
+        payload.update(extra)
+    with open(path, 'w') as f:
+        json.dump(payload, f, indent=2, default=str)
+    return path
+
+
+def print_report():
+    """Prints a compact per-stage table of the current report."""
+    summary = report()
+    if not summary:
+        return
+    print(f"\n{'stage':<28}{'calls':>7}{'total_s':>10}{'p95_s':>9}{'rows':>10}{'MB':>9}")
+    for stage, s in summary.items():
+        print(f"{stage:<28}{s['calls']:>7}{s['total_s']:>10.2f}{s['p95_s']:>9.3f}"
+              f"{s['rows']:>10}{s['bytes'] / 1e6:>9.2f}")
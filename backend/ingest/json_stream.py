@@ -0,0 +1,72 @@
+"""
+Incremental reader for large JSON array payloads.
+
+QuickStats wraps its rows as {"data": [{...}, {...}, ...]}. Instead of
+json.loads() over the whole body, iter_array_items() reads a binary file
+object chunk by chunk and decodes one array item at a time, so memory holds
+only the current chunk and the item being decoded.
+"""
+import codecs
+import json
+import re
+
+CHUNK_SIZE = 64 * 1024
+
+_SKIP = ' \t\r\n,'
+_END = _SKIP + ']'
+
+
+def iter_array_items(fp, key, chunk_size=CHUNK_SIZE):
+    """
+    Yields the items of the array stored under the top-level `key` of the
+    JSON document in `fp` (a binary file object). Yields nothing if the key
+    is absent; raises ValueError on malformed or truncated input.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    opener = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+    buf, pos, eof = '', 0, False
+
+    def fill():
+        # Appends the next chunk, dropping everything before `pos`
+        nonlocal buf, pos, eof
+        chunk = fp.read(chunk_size)
+        eof = not chunk
+        buf = buf[pos:] + utf8.decode(chunk, final=eof)
+        pos = 0
+        return not eof
+
+    # Locate the opening bracket of the array
+    while True:
+        match = opener.search(buf, pos)
+        if match:
+            pos = match.end()
+            break
+        # Keep a tail long enough to match a key split across chunks
+        pos = max(pos, len(buf) - len(key) - 64)
+        if not fill():
+            return
+
+    while True:
+        while True:
+            while pos < len(buf) and buf[pos] in _SKIP:
+                pos += 1
+            if pos < len(buf) or not fill():
+                break
+        if pos >= len(buf):
+            raise ValueError(f"Truncated JSON: '{key}' array is not closed")
+        if buf[pos] == ']':
+            return
+        while True:
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+                # A number cut at the buffer edge ('12' of '1234', '1500' of '1500.0')
+                # decodes fine on its own, so only accept items followed by a delimiter
+                if eof or (end < len(buf) and buf[end] in _END):
+                    break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            fill()
+        pos = end
+        yield item
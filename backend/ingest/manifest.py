@@ -0,0 +1,131 @@
+"""
+Ingestion run manifest for checkpointed, resumable ingestion.
+
+Every unit of work (one source for one state/county and year range) is
+recorded in the `ingest_manifest` table with its status, row count, timings
+and a content hash of the rows written. On rerun, units that already
+succeeded are skipped unless `force` is set.
+
+Statewide units use county '*'; sources without a year range (soil) use 0..0.
+
+The `ingest_watermarks` table keeps the latest year ingested per
+(source, state, county) so incremental runs only fetch newer years.
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+from sqlalchemy import select
+
+STATEWIDE = '*'
+
+STATUS_RUNNING = 'running'
+STATUS_SUCCESS = 'success'
+STATUS_FAILED = 'failed'
+
+
+def content_hash(df):
+    """Returns a sha256 over the values of `df` (order-sensitive, index ignored)."""
+    if df is None or df.empty:
+        return None
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.sha256(row_hashes.tobytes()).hexdigest()
+
+
+def is_done(engine, source, state, county, start_year, end_year):
+    """True if the unit has a successful manifest entry."""
+    from db.models import IngestManifest
+    query = select(IngestManifest.status).where(
+        IngestManifest.source == source,
+        IngestManifest.state == state,
+        IngestManifest.county == county,
+        IngestManifest.start_year == start_year,
+        IngestManifest.end_year == end_year,
+    )
+    with engine.connect() as conn:
+        status = conn.execute(query).scalar()
+    return status == STATUS_SUCCESS
+
+
+def record(engine, source, state, county, start_year, end_year, status, **fields):
+    """Inserts or updates the manifest entry for a unit."""
+    from db.models import IngestManifest
+    from backend.ingest.runner import bulk_upsert
+    row = {
+        'source': source, 'state': state, 'county': county,
+        'start_year': start_year, 'end_year': end_year, 'status': status,
+        'row_count': None, 'started_at': None, 'finished_at': None,
+        'duration_s': None, 'content_hash': None, 'error': None,
+    }
+    row.update(fields)
+    bulk_upsert(engine, IngestManifest.__table__, [row],
+                key_cols=('source', 'state', 'county', 'start_year', 'end_year'),
+                label='manifest', verbose=False, invalidate=False)
+
+
+def run_step(engine, source, state, county, start_year, end_year, fn, force=False):
+    """
+    Runs `fn()` for one unit unless it already succeeded (and `force` is False).
+
+    `fn` fetches and writes the data and returns the written DataFrame; a
+    None result is recorded as failed so the unit is retried next run, and
+    exceptions are recorded and re-raised. Returns (ran, result).
+    """
+    if not force and is_done(engine, source, state, county, start_year, end_year):
+        print(f"  - Skipping {source} for {county}, {state} {start_year}-{end_year} (already ingested)")
+        return False, None
+
+    started_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    t0 = time.perf_counter()
+    record(engine, source, state, county, start_year, end_year, STATUS_RUNNING, started_at=started_at)
+    try:
+        result = fn()
+    except Exception as e:
+        record(engine, source, state, county, start_year, end_year, STATUS_FAILED,
+               started_at=started_at, finished_at=datetime.now(timezone.utc).replace(tzinfo=None),
+               duration_s=time.perf_counter() - t0, error=f"{type(e).__name__}: {e}")
+        raise
+    status = STATUS_FAILED if result is None else STATUS_SUCCESS
+    record(engine, source, state, county, start_year, end_year, status,
+           started_at=started_at, finished_at=datetime.now(timezone.utc).replace(tzinfo=None),
+           duration_s=time.perf_counter() - t0,
+           row_count=0 if result is None else len(result),
+           content_hash=content_hash(result),
+           error='no data returned' if result is None else None)
+    return True, result
+
+
+def get_watermarks(engine):
+    """Returns {(source, state, county): last_year} for every stored watermark."""
+    from db.models import IngestWatermark
+    query = select(IngestWatermark.source, IngestWatermark.state,
+                   IngestWatermark.county, IngestWatermark.last_year)
+    with engine.connect() as conn:
+        return {(src, st, co): year for src, st, co, year in conn.execute(query)}
+
+
+def advance_watermarks(engine, source, df, state=None, county=None):
+    """
+    Moves watermarks forward to the latest year present in `df`, per county
+    (from its County column) or for the given `county`. Watermarks never move
+    backwards, and years with no rows don't advance them, so a year that
+    upstream has not published yet is retried next run.
+    """
+    from db.models import IngestWatermark
+    from backend.ingest.runner import bulk_upsert
+    if df is None or df.empty or 'Year' not in df.columns:
+        return
+    if county is not None:
+        latest = {(state or df['State'].iloc[0], county): int(df['Year'].max())}
+    else:
+        latest = {(st, co): int(y) for (st, co), y in df.groupby(['State', 'County'])['Year'].max().items()}
+    current = get_watermarks(engine)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    rows = [
+        {'source': source, 'state': st, 'county': co, 'last_year': year, 'updated_at': now}
+        for (st, co), year in latest.items()
+        if year > current.get((source, st, co), -1)
+    ]
+    bulk_upsert(engine, IngestWatermark.__table__, rows,
+                key_cols=('source', 'state', 'county'), label='watermark', verbose=False, invalidate=False)
@@ -1,23 +1,43 @@
 import sys
 import os
+import datetime
 import pandas as pd
 import requests
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session
-from backend.ingest.soil_ssurgo import fetch_and_transform_soil
-from backend.ingest.climate_nldas import fetch_and_transform_weather
-from backend.ingest.crop_nass import fetch_and_transform_yield_csv_fallback, fetch_and_transform_yield
-from backend.config import get_nass_api_key, get_database_url
+from backend.ingest import http_cache
+from backend.ingest import instrumentation
+from backend.ingest.instrumentation import timer
+from sqlalchemy import func, select
+from backend.ingest.soil_ssurgo import fetch_and_transform_soil, fetch_and_transform_soil_state
+from backend.ingest.climate_nldas import fetch_and_transform_weather, iter_weather_for_counties
+from backend.ingest.weather_store import write_daily_weather, write_weather_features
+from backend.ingest.weather_features import window_features
+from backend.ingest.crop_nass import fetch_and_transform_yield_csv_fallback, fetch_and_transform_yield, iter_yield_state_batches
+from backend.ingest.counties import get_county_cache
+from backend.ingest.manifest import STATEWIDE, is_done, run_step, advance_watermarks, get_watermarks
+from backend.ingest.scheduler import build_limiters, run_jobs, print_summary
+from backend.config import get_nass_api_key
+from backend.database import get_engine
+from backend import result_cache
 
 
 def get_counties_for_state(state_name):
-    """Queries the SDM API to get a list of all counties in a given state."""
+    """
+    Returns the list of all counties in a given state from the local county
+    cache, falling back to an SDM query if the cache is unavailable.
+    """
+    try:
+        counties = get_county_cache().counties_for_state(state_name)
+        if counties:
+            return counties
+    except Exception as e:
+        print(f"County cache unavailable ({e}); falling back to SDM.")
     print(f"Fetching county list for {state_name}...")
     sdm_api_url = "https://sdmdataaccess.nrcs.usda.gov/tabular/post.rest"
     query = f"SELECT areaname FROM sacatalog WHERE areaname LIKE '%, {state_name}'"
 
     try:
-        response = requests.post(sdm_api_url, data={"FORMAT": "JSON", "QUERY": query})
+        with timer('sdm.counties.fetch'):
+            response = http_cache.post('sdm', sdm_api_url, data={"FORMAT": "JSON", "QUERY": query})
         response.raise_for_status()
         data = response.json()['Table']
         if len(data) < 2: return []
@@ -30,29 +50,85 @@ def get_counties_for_state(state_name):
         return []
 
 
+def _to_records(df, columns):
+    """Convert DataFrame columns into a list of dicts of plain Python values (NaN -> None)."""
+    sub = df[columns].astype(object)
+    sub = sub.where(pd.notnull(sub), None)
+    return sub.to_dict('records')
+
+
+def bulk_upsert(engine, table, records, key_cols, coalesce_cols=(), batch_size=1000, label=None, verbose=True,
+                invalidate=True):
+    """
+    Writes `records` into `table` with INSERT ... ON CONFLICT (key_cols) DO UPDATE,
+    in batches of `batch_size` rows, one transaction per batch.
+
+    Columns listed in `coalesce_cols` keep their stored value when the incoming
+    value is NULL. Unless `invalidate` is False, each batch drops the result
+    cache entries that read `table` (only tables in result_cache.CACHED_TABLES
+    are invalidated). Prints a rows/sec figure per batch (unless `verbose` is
+    False) and returns the row count.
+    """
+    if not records:
+        return 0
+    dialect = engine.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise ValueError(f"Bulk upsert not supported for dialect '{dialect}'")
+
+    stmt = insert(table)
+    update_cols = [c for c in records[0] if c not in key_cols]
+    set_ = {
+        c: func.coalesce(stmt.excluded[c], table.c[c]) if c in coalesce_cols else stmt.excluded[c]
+        for c in update_cols
+    }
+    stmt = stmt.on_conflict_do_update(index_elements=list(key_cols), set_=set_)
+
+    label = label or table.name
+    # Writes to tables no cached endpoint reads cannot make a cached response stale
+    invalidate = invalidate and table.name in result_cache.CACHED_TABLES
+    total = 0
+    for i in range(0, len(records), batch_size):
+        batch = records[i:i + batch_size]
+        with timer(f'db.upsert.{label}') as span:
+            span.rows = len(batch)
+            states = {r.get('state') for r in batch}
+            with engine.begin() as conn:
+                conn.execute(stmt, batch)
+                if invalidate:
+                    result_cache.notify_invalidation(conn, table.name, states)
+            if invalidate:
+                result_cache.invalidate(table.name, states)
+        elapsed = span.seconds
+        total += len(batch)
+        rate = len(batch) / elapsed if elapsed > 0 else float('inf')
+        if verbose:
+            print(f"  - Upserted {len(batch)} {label} rows in {elapsed:.3f}s ({rate:,.0f} rows/sec)")
+    return total
+
+
 def upsert_soil_to_db(df, engine):
     """
-    Upserts a single-row DataFrame of soil features into the soil table.
-    Assumes columns: Soil_pH, Soil_CEC, PercentSand, PercentClay, OM_percent, County
+    Upserts soil features (one row per county) into the soil table.
+    Assumes columns: Soil_pH, Soil_CEC, PercentSand, PercentClay, OM_percent, County, State
     """
     from db.models import Soil
     if df is None or df.empty:
         print("No soil data to upsert.")
         return
-    row = df.iloc[0]
-    with Session(engine) as session:
-        # Upsert by county and state
-        obj = session.query(Soil).filter_by(county=row['County'], state=row['State']).first()
-        if obj is None:
-            obj = Soil(county=row['County'], state=row['State'])
-        obj.ph = row['Soil_pH']
-        obj.organic_matter = row['OM_percent']
-        obj.sand_pct = row['PercentSand']
-        obj.clay_pct = row['PercentClay']
-        # silt_pct could be computed if available
-        session.add(obj)
-        session.commit()
-        print(f"Upserted soil data for {row['County']}, {row['State']}")
+    out = df.rename(columns={
+        'County': 'county',
+        'State': 'state',
+        'Soil_pH': 'ph',
+        'OM_percent': 'organic_matter',
+        'PercentSand': 'sand_pct',
+        'PercentClay': 'clay_pct',
+    }).drop_duplicates(subset=['state', 'county'], keep='last')
+    records = _to_records(out, ['state', 'county', 'ph', 'organic_matter', 'sand_pct', 'clay_pct'])
+    bulk_upsert(engine, Soil.__table__, records, key_cols=('state', 'county'), label='soil')
 
 def upsert_weather_to_db(df, engine):
     """
@@ -63,21 +139,17 @@ def upsert_weather_to_db(df, engine):
     if df is None or df.empty:
         print("No weather data to upsert.")
         return
-    for _, row in df.iterrows():
-        with Session(engine) as session:
-            obj = session.query(Weather).filter_by(
-                year=row['Year'], county=row['County'], state=row['State']
-            ).first()
-            if obj is None:
-                obj = Weather(year=row['Year'], county=row['County'], state=row['State'])
-            obj.avg_temp = row.get('AvgTemp_C')
-            obj.precipitation = row.get('TotalPrecip_mm')
-            obj.gdd = row.get('TotalGDD')
-            obj.vp = row.get('vp')  # Vapor pressure
-            obj.srad = row.get('srad')  # Solar radiation
-            session.add(obj)
-            session.commit()
-            # print(f"Upserted weather data for {row['County']}, {row['State']}, {row['Year']}")
+    out = pd.DataFrame({
+        'year': df['Year'].astype(int),
+        'state': df['State'],
+        'county': df['County'],
+    })
+    for src, dst in [('AvgTemp_C', 'avg_temp'), ('TotalPrecip_mm', 'precipitation'),
+                     ('TotalGDD', 'gdd'), ('vp', 'vp'), ('srad', 'srad')]:
+        out[dst] = df[src] if src in df.columns else None
+    out = out.drop_duplicates(subset=['state', 'county', 'year'], keep='last')
+    records = _to_records(out, list(out.columns))
+    bulk_upsert(engine, Weather.__table__, records, key_cols=('state', 'county', 'year'), label='weather')
 
 def upsert_yield_to_db(df, engine):
     """
@@ -88,36 +160,260 @@ def upsert_yield_to_db(df, engine):
     if df is None or df.empty:
         print("No yield data to upsert.")
         return
-    for _, row in df.iterrows():
-        with Session(engine) as session:
-            obj = session.query(Yield).filter_by(
-                year=row['Year'], county=row['County'], state=row['State'], crop=row.get('Crop', None)
-            ).first()
-            if obj is None:
-                obj = Yield(year=row['Year'], county=row['County'], state=row['State'], crop=row.get('Crop', None))
-            # db model uses 'value' and 'unit'
-            obj.value = row.get('CropYield_bu_ac') if row.get('CropYield_bu_ac') is not None else row.get('Value')
-            # DataItem/commodity unit may be present
-            obj.unit = row.get('DataItem') or row.get('unit')
-            # Set district and county_ansi if present
-            if 'district' in row and pd.notnull(row['district']):
-                obj.district = row['district']
-            if 'county_ansi' in row and pd.notnull(row['county_ansi']):
-                obj.county_ansi = str(row['county_ansi'])
-            session.add(obj)
-            session.commit()
-            print(f"Upserted yield data for {row['County']}, {row['State']}, {row['Year']}, crop={obj.crop}")
-
-
-def main():
-    """Default CSV-driven bulk ingestion (no CLI args).
+    # db model uses 'value' and 'unit'
+    value = df['CropYield_bu_ac'] if 'CropYield_bu_ac' in df.columns else df.get('Value')
+    # DataItem/commodity unit may be present
+    unit = df['DataItem'] if 'DataItem' in df.columns else df.get('unit')
+    out = pd.DataFrame({
+        'year': df['Year'].astype(int),
+        'state': df['State'],
+        'county': df['County'],
+        'crop': df['Crop'] if 'Crop' in df.columns else None,
+        'value': value,
+        'unit': unit,
+        'district': df['district'] if 'district' in df.columns else None,
+        'county_ansi': df['county_ansi'].astype(str).where(df['county_ansi'].notna())
+        if 'county_ansi' in df.columns else None,
+    })
+    missing_key = out['crop'].isna() | out['value'].isna()
+    if missing_key.any():
+        print(f"  - Skipping {int(missing_key.sum())} yield rows without crop or value.")
+        out = out[~missing_key]
+    out = out.drop_duplicates(subset=['state', 'county', 'year', 'crop'], keep='last')
+    records = _to_records(out, list(out.columns))
+    # district/county_ansi are only overwritten when the new row carries a value
+    bulk_upsert(engine, Yield.__table__, records, key_cols=('state', 'county', 'year', 'crop'),
+                coalesce_cols=('district', 'county_ansi'), label='yield')
+
+
+def _stored_soil_counties(engine, state):
+    """Upper-cased county names that already have a soil row for `state`."""
+    from db.models import Soil
+    with engine.connect() as conn:
+        counties = conn.execute(select(Soil.county).where(Soil.state == state)).scalars().all()
+    return {c.upper() for c in counties}
+
+
+def ingest_state_soil(state, engine, limiters, force=False):
+    """
+    Fetches and upserts soil for every county in a state with one SDM request.
+    Returns the set of upper-cased county names that were covered.
+    """
+    def step():
+        with limiters['sdm'].slot():
+            soil_df = fetch_and_transform_soil_state(state)
+        if soil_df is not None and not soil_df.empty:
+            upsert_soil_to_db(soil_df, engine)
+        return soil_df
+
+    ran, soil_df = run_step(engine, 'soil', state, STATEWIDE, 0, 0, step, force=force)
+    if not ran:
+        return _stored_soil_counties(engine, state)
+    if soil_df is None or soil_df.empty:
+        return set()
+    return set(soil_df['County'].str.upper())
+
+
+def ingest_state_yield(state, start_y, end_y, engine, api_key, limiters, force=False):
+    """
+    Streams NASS yields for every county in a state from statewide
+    QuickStats requests and upserts them batch by batch, so memory stays flat
+    regardless of response size. Returns False if the fetch failed.
+    """
+    def step():
+        # Only the key columns of written rows are kept, for the manifest hash and watermarks
+        written = []
+        print(f"Streaming statewide crop yield data for {state} from USDA NASS...")
+        try:
+            # The NASS slot covers each upstream request, not the upserts between batches
+            for yield_df in iter_yield_state_batches(api_key, state, start_y, end_y, limiter=limiters['nass']):
+                upsert_yield_to_db(yield_df, engine)
+                written.append(yield_df[[c for c in ('State', 'County', 'Year', 'Crop', 'CropYield_bu_ac')
+                                         if c in yield_df.columns]])
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"  - Failed to get statewide USDA data for {state}. Error: {e}")
+            return None
+        if not written:
+            print(f"  - No yield data found for {state}, {start_y}-{end_y}.")
+            return pd.DataFrame()
+        yield_df = pd.concat(written, ignore_index=True)
+        advance_watermarks(engine, 'yield', yield_df)
+        advance_watermarks(engine, 'yield', yield_df, state=state, county=STATEWIDE)
+        return yield_df
+
+    ran, yield_df = run_step(engine, 'yield', state, STATEWIDE, start_y, end_y, step, force=force)
+    return not ran or yield_df is not None
+
+
+def store_county_weather(county, state, weather_df, daily_df, engine):
+    """Writes one county's daily store, feature table and annual weather rows. Returns weather_df."""
+    # Keep the daily series so new aggregates can be computed offline
+    with timer('store.daily_weather.write') as span:
+        span.rows = write_daily_weather(daily_df)
+    with timer('store.weather_features.write') as span:
+        span.rows = write_weather_features(window_features(daily_df))
+    upsert_weather_to_db(weather_df, engine)
+    advance_watermarks(engine, 'weather', weather_df, state=state, county=county)
+    return weather_df
+
+
+def ingest_weather_batch(units, engine, limiters, force=False):
+    """
+    Fetches weather for many counties in one batched Daymet pass, so each
+    distinct 1 km pixel is downloaded once with limiters['daymet'] bounding
+    concurrency, and checkpoints every county in the manifest.
+
+    `units` is a list of (county, state, start_y, end_y, unit_force); a unit
+    that already succeeded is skipped unless `force` or `unit_force` is set.
+    Returns {(county, state): rows upserted} for the counties whose weather
+    is done (0 when skipped); the others, including counties whose storage
+    step raised, are left for the per-county fallback.
+    """
+    done = {}
+    by_range = {}
+    for county, state, start_y, end_y, unit_force in units:
+        if not (force or unit_force) and is_done(engine, 'weather', state, county, start_y, end_y):
+            done[(county, state)] = 0
+            continue
+        by_range.setdefault((start_y, end_y), []).append((county, state))
+    limiter = limiters['daymet']
+    for (start_y, end_y), counties in by_range.items():
+        results = iter_weather_for_counties(counties, start_y, end_y,
+                                            max_workers=limiter.max_concurrency, limiter=limiter)
+        for (county, state), weather_df, daily_df in results:
+            if weather_df is None:
+                continue
+            # An empty result (year not published yet) is recorded as failed and retried next run
+            try:
+                run_step(engine, 'weather', state, county, start_y, end_y,
+                         lambda: None if weather_df.empty else
+                         store_county_weather(county, state, weather_df, daily_df, engine), force=True)
+            except Exception as e:
+                # One county's storage or DB error must not end the run; its job retries per county
+                print(f"  - Failed to store batched weather for {county}, {state}: {type(e).__name__}: {e}")
+                continue
+            done[(county, state)] = len(weather_df)
+    return done
+
+
+def ingest_county(county, state, start_y, end_y, engine, api_key, limiters,
+                  fetch_soil=True, fetch_yield=True, force=False, source_years=None):
+    """
+    Fetches and upserts soil, weather and yield for one county.
+
+    Each upstream call runs inside its source's limiter slot so the scheduler
+    can bound per-source concurrency and request rate. Soil and yield are
+    skipped when `fetch_soil`/`fetch_yield` is False (already covered by a
+    statewide fetch). Each source is checkpointed in the ingest manifest and
+    skipped if it already succeeded, unless `force` is set.
+
+    `source_years` optionally overrides the year range per source
+    ({'weather': (start, end)}); a None range skips that source. Those
+    ranges come from watermarks, which already decide what is left to fetch,
+    so they bypass the manifest skip (an empty, not-yet-published year must
+    be retried). Returns a dict of upserted row counts per source that ran.
+    """
+    source_years = source_years or {}
+    print(f"\nProcessing {county}, {state}: {start_y}-{end_y}")
+    counts = {}
+
+    def soil_step():
+        with limiters['sdm'].slot():
+            soil_df = fetch_and_transform_soil(county, state)
+        upsert_soil_to_db(soil_df, engine)
+        return soil_df
+
+    def weather_step(start_y, end_y):
+        with limiters['daymet'].slot():
+            weather_df = fetch_and_transform_weather(county, state, start_y, end_y)
+        daily_df = None
+        if isinstance(weather_df, tuple):
+            weather_df, daily_df = weather_df
+        return store_county_weather(county, state, weather_df, daily_df, engine)
+
+    def yield_step(start_y, end_y):
+        # Yield (NASS API or CSV fallback)
+        if api_key:
+            with limiters['nass'].slot():
+                yield_df = fetch_and_transform_yield(api_key, county, state, start_y, end_y)
+        else:
+            yield_df = fetch_and_transform_yield_csv_fallback(county, state, start_y, end_y)
+        if yield_df is None:
+            # Request failed: leave the unit failed in the manifest so it is retried
+            return None
+        upsert_yield_to_db(yield_df, engine)
+        advance_watermarks(engine, 'yield', yield_df, state=state, county=county)
+        return yield_df
+
+    steps = []
+    if fetch_soil:
+        steps.append(('soil', (0, 0), lambda first, last: soil_step()))
+    steps.append(('weather', source_years.get('weather', (start_y, end_y)), weather_step))
+    if fetch_yield:
+        steps.append(('yield', source_years.get('yield', (start_y, end_y)), yield_step))
+    for source, years, step in steps:
+        if years is None:
+            print(f"  - {source} for {county}, {state} is up to date or already ingested")
+            continue
+        first, last = years
+        ran, df = run_step(engine, source, state, county, first, last,
+                           lambda: step(first, last), force=force or source in source_years)
+        if ran:
+            counts[source] = 0 if df is None else len(df)
+    return counts
+
+
+def incremental_range(watermarks, source, state, county, start_y, end_y):
+    """
+    Year range still to fetch for an incremental run: from the year after the
+    stored watermark (or `start_y` if there is none) through `end_y`.
+    Returns None when the source is already up to date.
+    """
+    last = watermarks.get((source, state, county))
+    first = start_y if last is None else max(start_y, last + 1)
+    if first > end_y:
+        return None
+    return (first, end_y)
+
+
+def main(argv=None):
+    """Default CSV-driven bulk ingestion.
 
     Reads `/crop_yield_1980_2022.csv` from the repo and for each
     County/State group computes the year range and ingests soil, weather,
     and yield (via NASS API) data into the database.
+
+    Counties are ingested concurrently (INGEST_WORKERS, default 8) with a
+    separate concurrency/rate limit per upstream source; see
+    backend/ingest/scheduler.py.
+
+    Progress is checkpointed in the ingest manifest: by default (--resume)
+    work that already succeeded is skipped; --force re-fetches everything.
+
+    With --incremental, weather and yield are only fetched for the years
+    after each county's stored watermark, through --end-year (default: last
+    year), so a nightly refresh only pulls the newest season.
     """
-    db_url = get_database_url()
-    engine = create_engine(db_url)
+    import argparse
+    parser = argparse.ArgumentParser(description="CSV-driven bulk ingestion runner")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--resume', dest='force', action='store_false',
+                      help="skip work already recorded as successful in the manifest (default)")
+    mode.add_argument('--force', dest='force', action='store_true',
+                      help="ignore the manifest and re-fetch everything")
+    parser.set_defaults(force=False)
+    parser.add_argument('--incremental', action='store_true',
+                        help="only fetch years after each source's stored watermark")
+    parser.add_argument('--end-year', type=int, default=None,
+                        help="last year to ingest (default: CSV max, or last year with --incremental)")
+    parser.add_argument('--report', default=None,
+                        help="path for the JSON run report (default: data/ingest_reports/run-<timestamp>.json)")
+    args = parser.parse_args(argv)
+    instrumentation.reset()
+    if args.incremental and args.end_year is None:
+        args.end_year = datetime.date.today().year - 1
+
+    engine = get_engine()
     
     # Get NASS API key from config
     api_key = get_nass_api_key()
@@ -130,6 +426,8 @@ def main():
         use_api = True
 
     print("\n--- BULK INGESTION FROM CSV (default) ---")
+    print("Mode: " + ("force (ignoring manifest)" if args.force else "resume")
+          + (f", incremental through {args.end_year}" if args.incremental else ""))
     csv_path = os.path.join(os.path.dirname(__file__), '../../crop_yield_1980-2022.csv')
     print(f"Reading CSV: {csv_path}")
     try:
@@ -145,6 +443,33 @@ def main():
             print(f"CSV missing required column: {r}")
             return
 
+    dry_run = bool(os.environ.get('DRY_RUN', '') and os.environ.get('DRY_RUN') != '0')
+    limiters = build_limiters()
+    watermarks = get_watermarks(engine) if args.incremental else {}
+
+    # Soil: one statewide SDM request per state; counties it misses fall back to per-county fetches
+    soil_covered = {}
+    # Yield: with the API, one statewide (paginated) NASS fetch per state replaces per-county requests
+    yield_covered = set()
+    if not dry_run:
+        state_years = df.dropna(subset=['State', 'Year']).assign(State=lambda d: d['State'].astype(str).str.strip())
+        for state, years in state_years.groupby('State')['Year']:
+            soil_covered[state] = ingest_state_soil(state, engine, limiters, force=args.force)
+            if not use_api:
+                continue
+            start_y, end_y = int(years.min()), args.end_year or int(years.max())
+            if args.incremental:
+                state_range = incremental_range(watermarks, 'yield', state, STATEWIDE, start_y, end_y)
+                if state_range is None:
+                    print(f"Yield for {state} is up to date through {end_y}")
+                    yield_covered.add(state)
+                    continue
+                start_y, end_y = state_range
+            if ingest_state_yield(state, start_y, end_y, engine, api_key, limiters,
+                                  force=args.force or args.incremental):
+                yield_covered.add(state)
+
+    jobs = []
     grouped = df.groupby(['County', 'State'])
     for (county, state), group in grouped:
         county = str(county).strip()
@@ -152,10 +477,15 @@ def main():
         years = group['Year'].dropna().astype(int)
         if years.empty:
             continue
-        start_y, end_y = int(years.min()), int(years.max())
-        print(f"\nProcessing {county}, {state}: {start_y}-{end_y}")
-        dry_run = bool(os.environ.get('DRY_RUN', '') and os.environ.get('DRY_RUN') != '0')
+        start_y, end_y = int(years.min()), args.end_year or int(years.max())
+        source_years = {}
+        if args.incremental:
+            source_years = {
+                source: incremental_range(watermarks, source, state, county, start_y, end_y)
+                for source in ('weather', 'yield')
+            }
         if dry_run:
+            print(f"\nProcessing {county}, {state}: {start_y}-{end_y}")
             print(f"  - DRY RUN: would fetch soil for {county}, {state}")
             print(f"  - DRY RUN: would fetch weather for {county}, {state} years {start_y}-{end_y}")
             if use_api:
@@ -163,20 +493,45 @@ def main():
             else:
                 print(f"  - DRY RUN: would ingest yield from local CSV for {county}, {state} years {start_y}-{end_y}")
             continue
-        # Soil
-        soil_df = fetch_and_transform_soil(county, state)
-        upsert_soil_to_db(soil_df, engine)
-        # Weather
-        weather_df = fetch_and_transform_weather(county, state, start_y, end_y)
-        if isinstance(weather_df, tuple):
-            weather_df = weather_df[0]
-        upsert_weather_to_db(weather_df, engine)
-        # Yield (NASS API or CSV fallback)
-        if use_api:
-            yield_df = fetch_and_transform_yield(api_key, county, state, start_y, end_y)
+        jobs.append(((county, state), dict(
+            county=county, state=state, start_y=start_y, end_y=end_y,
+            engine=engine, api_key=api_key if use_api else None, limiters=limiters,
+            fetch_soil=county.upper() not in soil_covered.get(state, set()),
+            fetch_yield=state not in yield_covered,
+            force=args.force, source_years=source_years,
+        )))
+
+    if not jobs:
+        return
+
+    # Weather: one batched Daymet pass over every county (each distinct pixel fetched once);
+    # counties it misses fall back to per-county fetches in their job
+    units = []
+    for (county, state), kwargs in jobs:
+        if 'weather' in kwargs['source_years']:
+            weather_years = kwargs['source_years']['weather']
+            if weather_years is not None:
+                units.append((county, state, *weather_years, True))
         else:
-            yield_df = fetch_and_transform_yield_csv_fallback(county, state, start_y, end_y)
-        upsert_yield_to_db(yield_df, engine)
+            units.append((county, state, kwargs['start_y'], kwargs['end_y'], False))
+    weather_covered = ingest_weather_batch(units, engine, limiters, force=args.force)
+    for key, kwargs in jobs:
+        if key in weather_covered:
+            kwargs['source_years'] = dict(kwargs['source_years'], weather=None)
+    max_workers = int(os.environ.get('INGEST_WORKERS', 8))
+    print(f"\nIngesting {len(jobs)} counties with {max_workers} workers...")
+    successes, failures = run_jobs(jobs, ingest_county, max_workers=max_workers)
+    for key, counts in successes.items():
+        if weather_covered.get(key):
+            counts['weather'] = weather_covered[key]
+    print_summary(successes, failures)
+    instrumentation.print_report()
+    report_path = instrumentation.write_report(args.report, extra={
+        'counties_succeeded': len(successes),
+        'counties_failed': {f"{c}, {s}": f"{type(e).__name__}: {e}" for (c, s), e in failures.items()},
+        'rows_by_county': {f"{c}, {s}": counts for (c, s), counts in successes.items()},
+    })
+    print(f"Run report written to {report_path}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,98 @@
+"""
+Bounded-concurrency scheduler for multi-county ingestion.
+
+Each upstream source (SDM, Daymet, NASS) gets its own SourceLimiter which caps
+the number of in-flight requests and spaces request starts to a maximum rate.
+Counties are processed on a thread pool; a failing county is recorded and the
+remaining counties keep running.
+"""
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+
+# source -> (max concurrent requests, max requests started per second)
+DEFAULT_SOURCE_LIMITS = {
+    'sdm': (4, 4.0),
+    'daymet': (4, 4.0),
+    'nass': (2, 1.0),
+}
+
+
+class SourceLimiter:
+    """Caps concurrency and request rate for a single upstream source."""
+
+    def __init__(self, name, max_concurrency, max_per_second):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_per_second = max_per_second
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+
+    def _wait_for_rate(self):
+        if not self.max_per_second:
+            return
+        interval = 1.0 / self.max_per_second
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + interval
+        delay = start - now
+        if delay > 0:
+            time.sleep(delay)
+
+    @contextmanager
+    def slot(self):
+        """Blocks until a request to this source may start, then holds a concurrency slot."""
+        with self._semaphore:
+            self._wait_for_rate()
+            yield
+
+
+def build_limiters(limits=None):
+    """
+    Builds one SourceLimiter per source.
+
+    Limits can be overridden per source with environment variables, e.g.
+    INGEST_NASS_CONCURRENCY=1 and INGEST_NASS_RATE=0.5.
+    """
+    limits = dict(DEFAULT_SOURCE_LIMITS, **(limits or {}))
+    limiters = {}
+    for name, (concurrency, rate) in limits.items():
+        concurrency = int(os.environ.get(f'INGEST_{name.upper()}_CONCURRENCY', concurrency))
+        rate = float(os.environ.get(f'INGEST_{name.upper()}_RATE', rate))
+        limiters[name] = SourceLimiter(name, concurrency, rate)
+    return limiters
+
+
+def run_jobs(jobs, worker, max_workers=8):
+    """
+    Runs worker(**kwargs) for each (key, kwargs) in `jobs` on a thread pool.
+
+    Returns (successes, failures): successes maps key -> worker result and
+    failures maps key -> exception. Exceptions never stop other jobs.
+    """
+    successes, failures = {}, {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(worker, **kwargs): key for key, kwargs in jobs}
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                successes[key] = future.result()
+            except Exception as e:
+                failures[key] = e
+                print(f"  - FAILED {key}: {e}")
+                traceback.print_exception(type(e), e, e.__traceback__)
+    return successes, failures
+
+
+def print_summary(successes, failures):
+    """Prints a final success/failure summary for a scheduler run."""
+    print("\n--- INGESTION SUMMARY ---")
+    print(f"Succeeded: {len(successes)}")
+    print(f"Failed:    {len(failures)}")
+    for key, e in sorted(failures.items(), key=lambda kv: str(kv[0])):
+        print(f"  - {key}: {type(e).__name__}: {e}")
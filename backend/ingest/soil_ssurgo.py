@@ -1,5 +1,39 @@
 import requests
+from backend.ingest import http_cache
+from backend.ingest.instrumentation import timer
 import pandas as pd
+from backend.ingest.counties import parse_areaname
+
+SDM_API_URL = "https://sdmdataaccess.nrcs.usda.gov/tabular/post.rest"
+
+SOIL_NUMERIC_COLS = ['muacres', 'comppct_r', 'ph1to1h2o_r', 'cec7_r', 'sandtotal_r', 'claytotal_r', 'om_r']
+
+# SDM horizon property -> output feature
+SOIL_FEATURES = {
+    'ph1to1h2o_r': 'Soil_pH',
+    'cec7_r': 'Soil_CEC',
+    'sandtotal_r': 'PercentSand',
+    'claytotal_r': 'PercentClay',
+    'om_r': 'OM_percent',
+}
+
+
+def aggregate_soil_components(soil_df):
+    """
+    Computes area-weighted topsoil properties per `areaname` in one grouped pass.
+    Expects cleaned numeric SOIL_NUMERIC_COLS plus an `areaname` column and
+    returns one row per areaname with the SOIL_FEATURES columns.
+    """
+    with timer('soil.transform') as span:
+        span.rows = len(soil_df)
+        acres = (soil_df['comppct_r'] / 100) * soil_df['muacres']
+        props = list(SOIL_FEATURES)
+        weighted = soil_df[props].mul(acres, axis=0)
+        weighted['component_acres'] = acres
+        weighted['areaname'] = soil_df['areaname'].values
+        sums = weighted.groupby('areaname', sort=True).sum()
+        features = sums[props].div(sums['component_acres'], axis=0).rename(columns=SOIL_FEATURES)
+        return features.reset_index()
 
 def fetch_and_transform_soil(county_name, state_name):
     """
@@ -8,7 +42,6 @@ def fetch_and_transform_soil(county_name, state_name):
     Returns a DataFrame with one row of features, or None if not found.
     """
     print(f"Fetching SSURGO soil data for {county_name}, {state_name}...")
-    sdm_api_url = "https://sdmdataaccess.nrcs.usda.gov/tabular/post.rest"
     query = f"""
     SELECT
         mu.muacres,
@@ -28,33 +61,80 @@ def fetch_and_transform_soil(county_name, state_name):
     AND ch.hzname IN ('Ap', 'A', 'A1')
     """
     try:
-        response = requests.post(sdm_api_url, data={"FORMAT": "JSON+COLUMNNAME", "QUERY": query})
-        response.raise_for_status()
-        data = response.json()
+        with timer('soil.fetch') as span:
+            response = http_cache.post('sdm', SDM_API_URL, data={"FORMAT": "JSON+COLUMNNAME", "QUERY": query})
+            response.raise_for_status()
+            span.bytes = len(response.content)
+            data = response.json()
         if 'Table' not in data or len(data['Table']) < 2:
             print(f"  - No soil data found for {county_name}.")
             return None
         soil_df = pd.DataFrame(data['Table'][1:], columns=data['Table'][0])
-        numeric_cols = ['muacres', 'comppct_r', 'ph1to1h2o_r', 'cec7_r', 'sandtotal_r', 'claytotal_r', 'om_r']
-        for col in numeric_cols:
+        for col in SOIL_NUMERIC_COLS:
             soil_df[col] = pd.to_numeric(soil_df[col], errors='coerce')
         soil_df.dropna(inplace=True)
         if soil_df.empty:
             print(f"  - Data for {county_name} was incomplete after cleaning.")
             return None
-        soil_df['component_acres'] = (soil_df['comppct_r'] / 100) * soil_df['muacres']
-        total_acres = soil_df['component_acres'].sum()
-        soil_features = {
-            'Soil_pH': (soil_df['ph1to1h2o_r'] * soil_df['component_acres']).sum() / total_acres,
-            'Soil_CEC': (soil_df['cec7_r'] * soil_df['component_acres']).sum() / total_acres,
-            'PercentSand': (soil_df['sandtotal_r'] * soil_df['component_acres']).sum() / total_acres,
-            'PercentClay': (soil_df['claytotal_r'] * soil_df['component_acres']).sum() / total_acres,
-            'OM_percent': (soil_df['om_r'] * soil_df['component_acres']).sum() / total_acres,
-            'County': county_name,
-            'State': state_name
-        }
+        soil_df['areaname'] = county_name
+        features = aggregate_soil_components(soil_df)
+        features['County'] = county_name
+        features['State'] = state_name
         print(f"Soil data processing complete for {county_name}. ✅")
-        return pd.DataFrame([soil_features])
+        return features[['Soil_pH', 'Soil_CEC', 'PercentSand', 'PercentClay', 'OM_percent', 'County', 'State']]
     except requests.exceptions.RequestException as e:
         print(f"  - Failed to get soil data for {county_name}. Error: {e}")
         return None
+
+
+def fetch_and_transform_soil_state(state_name):
+    """
+    Fetches SSURGO data for every county in a state with a single SDM query
+    and computes each county's area-weighted topsoil properties in one
+    vectorized groupby.
+    Returns a DataFrame with one row per county, or None if nothing was found.
+    County names are upper-cased to match the CSV/NASS naming used elsewhere.
+    """
+    print(f"Fetching statewide SSURGO soil data for {state_name}...")
+    query = f"""
+    SELECT
+        sc.areaname,
+        mu.muacres,
+        co.comppct_r,
+        ch.ph1to1h2o_r,
+        ch.cec7_r,
+        ch.sandtotal_r,
+        ch.claytotal_r,
+        ch.om_r
+    FROM sacatalog sc
+    LEFT JOIN legend lg ON sc.areasymbol = lg.areasymbol
+    LEFT JOIN mapunit mu ON lg.lkey = mu.lkey
+    LEFT JOIN component co ON mu.mukey = co.mukey
+    LEFT JOIN chorizon ch ON co.cokey = ch.cokey
+    WHERE sc.areaname LIKE '%, {state_name}'
+    AND co.compkind = 'Series'
+    AND ch.hzname IN ('Ap', 'A', 'A1')
+    """
+    try:
+        with timer('soil.fetch_state') as span:
+            response = http_cache.post('sdm', SDM_API_URL, data={"FORMAT": "JSON+COLUMNNAME", "QUERY": query})
+            response.raise_for_status()
+            span.bytes = len(response.content)
+            data = response.json()
+    except requests.exceptions.RequestException as e:
+        print(f"  - Failed to get statewide soil data for {state_name}. Error: {e}")
+        return None
+    if 'Table' not in data or len(data['Table']) < 2:
+        print(f"  - No soil data found for {state_name}.")
+        return None
+    soil_df = pd.DataFrame(data['Table'][1:], columns=data['Table'][0])
+    soil_df[SOIL_NUMERIC_COLS] = soil_df[SOIL_NUMERIC_COLS].apply(pd.to_numeric, errors='coerce')
+    soil_df.dropna(inplace=True)
+    if soil_df.empty:
+        print(f"  - Statewide soil data for {state_name} was incomplete after cleaning.")
+        return None
+    features = aggregate_soil_components(soil_df)
+    features['County'] = features['areaname'].map(lambda a: parse_areaname(a)[0].upper())
+    features['State'] = state_name
+    print(f"Statewide soil data processing complete for {state_name}: {len(features)} counties. ✅")
+    return features[['Soil_pH', 'Soil_CEC', 'PercentSand', 'PercentClay', 'OM_percent', 'County', 'State']]
@@ -0,0 +1,222 @@
+"""
+Vectorized weather feature engine.
+
+Turns daily Daymet rows (Year, DayOfYear, tmax, tmin, prcp, vp, srad) for any
+number of counties into annual growing-season features in a single grouped
+pass, instead of filtering the frame once per year.
+
+window_features() generalizes this to a list of feature specs over arbitrary
+calendar windows (months, the silking period, the whole season), each
+reduced with one cumulative-sum lookup per county-year:
+
+    {'stat': 'sum',  'var': 'prcp', 'window': SEASON_WINDOW}
+    {'stat': 'mean', 'var': 'tmax', 'window': SILKING_WINDOW}
+    {'stat': 'gdd',  'base': 10, 'cap': 30, 'window': ('jul', '07-01', '07-31')}
+    {'stat': 'days_above', 'var': 'tmax', 'threshold': 35, 'window': SEASON_WINDOW}
+
+Windows are (name, 'MM-DD' start, 'MM-DD' end), both ends inclusive. Columns
+are named '<stat>_<window>' (e.g. prcp_sum_season, gdd10_30_jul,
+tmax_above35_silking) unless the spec carries its own 'name'.
+"""
+import numpy as np
+import pandas as pd
+
+GROUP_COLS = ['State', 'County', 'Year']
+
+# Growing season (inclusive months) and GDD base temperature (°C)
+GROWING_SEASON_MONTHS = (5, 9)
+GDD_BASE_C = 10.0
+
+
+def add_date_columns(daily_df):
+    """
+    Adds 'date' and 'Month' columns computed arithmetically from Year and
+    DayOfYear (no string formatting/parsing). Modifies and returns `daily_df`.
+    """
+    years = daily_df['Year'].to_numpy(dtype='int64')
+    ydays = daily_df['DayOfYear'].to_numpy(dtype='int64')
+    dates = (years - 1970).astype('datetime64[Y]').astype('datetime64[D]') + (ydays - 1).astype('timedelta64[D]')
+    daily_df['date'] = dates
+    months = dates.astype('datetime64[M]').astype('int64') % 12 + 1
+    daily_df['Month'] = months
+    return daily_df
+
+
+def annual_growing_season_features(daily_df, months=GROWING_SEASON_MONTHS, gdd_base=GDD_BASE_C):
+    """
+    Computes per (State, County, Year) growing-season aggregates in one pass:
+    TotalPrecip_mm, AvgTemp_C, TotalGDD, vp and srad.
+
+    Every (State, County, Year) present in `daily_df` gets a row; years with no
+    growing-season days get zero sums and NaN means, matching the old loop.
+    """
+    if daily_df is None or daily_df.empty:
+        return pd.DataFrame(columns=GROUP_COLS + ['TotalPrecip_mm', 'AvgTemp_C', 'TotalGDD', 'vp', 'srad'])
+    if 'Month' in daily_df.columns:
+        month = daily_df['Month'].to_numpy()
+    else:
+        month = pd.DatetimeIndex(daily_df['date']).month.to_numpy()
+    in_season = (month >= months[0]) & (month <= months[1])
+
+    t_avg = (daily_df['tmax'].to_numpy(dtype='float64') + daily_df['tmin'].to_numpy(dtype='float64')) / 2
+    t_avg = np.where(in_season, t_avg, np.nan)
+    masked = pd.DataFrame({
+        'TotalPrecip_mm': np.where(in_season, daily_df['prcp'].to_numpy(dtype='float64'), np.nan),
+        'AvgTemp_C': t_avg,
+        'TotalGDD': np.clip(t_avg - gdd_base, 0, None),  # GDD can't be negative
+        'vp': np.where(in_season, daily_df['vp'].to_numpy(dtype='float64'), np.nan),
+        'srad': np.where(in_season, daily_df['srad'].to_numpy(dtype='float64'), np.nan),
+    })
+    for col in GROUP_COLS:
+        masked[col] = daily_df[col].to_numpy()
+
+    grouped = masked.groupby(GROUP_COLS, sort=True)
+    sums = grouped[['TotalPrecip_mm', 'TotalGDD']].sum(min_count=0)
+    means = grouped[['AvgTemp_C', 'vp', 'srad']].mean()
+    features = sums.join(means).reset_index()
+    return features[['Year', 'TotalPrecip_mm', 'AvgTemp_C', 'TotalGDD', 'County', 'State', 'vp', 'srad']]
+
+
+# Feature windows: (name, first day, last day), inclusive
+SEASON_WINDOW = ('season', '05-01', '09-30')
+# Corn silking / pollination, the yield-critical period
+SILKING_WINDOW = ('silking', '07-01', '08-15')
+MONTH_WINDOWS = [
+    ('may', '05-01', '05-31'),
+    ('jun', '06-01', '06-30'),
+    ('jul', '07-01', '07-31'),
+    ('aug', '08-01', '08-31'),
+    ('sep', '09-01', '09-30'),
+]
+
+# Daily variables a spec can reference; 'tavg' is derived as (tmax + tmin) / 2
+FEATURE_VARS = ('prcp', 'tmax', 'tmin', 'tavg', 'vp', 'srad')
+FEATURE_STATS = ('sum', 'mean', 'gdd', 'days_above')
+
+DEFAULT_FEATURE_SPECS = (
+    [{'stat': 'sum', 'var': 'prcp', 'window': w} for w in [SEASON_WINDOW, SILKING_WINDOW] + MONTH_WINDOWS]
+    + [{'stat': 'mean', 'var': 'tavg', 'window': w} for w in [SEASON_WINDOW, SILKING_WINDOW] + MONTH_WINDOWS]
+    + [{'stat': 'mean', 'var': v, 'window': SEASON_WINDOW} for v in ('tmax', 'vp', 'srad')]
+    + [{'stat': 'gdd', 'base': b, 'cap': None, 'window': SEASON_WINDOW} for b in (8.0, 10.0)]
+    + [{'stat': 'gdd', 'base': 10.0, 'cap': 30.0, 'window': w} for w in [SEASON_WINDOW, SILKING_WINDOW] + MONTH_WINDOWS]
+    + [{'stat': 'days_above', 'var': 'tmax', 'threshold': t, 'window': w}
+       for t in (32.0, 35.0) for w in (SEASON_WINDOW, SILKING_WINDOW)]
+)
+
+
+def feature_name(spec):
+    """Column name for a feature spec."""
+    if spec.get('name'):
+        return spec['name']
+    stat, window = spec['stat'], spec['window'][0]
+    if stat == 'gdd':
+        cap = spec.get('cap')
+        return f"gdd{spec['base']:g}" + (f"_{cap:g}" if cap is not None else '') + f"_{window}"
+    if stat == 'days_above':
+        return f"{spec['var']}_above{spec['threshold']:g}_{window}"
+    return f"{spec['var']}_{stat}_{window}"
+
+
+def _validate_spec(spec):
+    stat = spec.get('stat')
+    if stat not in FEATURE_STATS:
+        raise ValueError(f"Unknown feature stat {stat!r}; expected one of {FEATURE_STATS}")
+    if stat != 'gdd' and spec.get('var') not in FEATURE_VARS:
+        raise ValueError(f"Unknown feature variable {spec.get('var')!r}; expected one of {FEATURE_VARS}")
+    if stat == 'gdd' and spec.get('base') is None:
+        raise ValueError("gdd specs need a 'base' temperature")
+    if stat == 'days_above' and spec.get('threshold') is None:
+        raise ValueError("days_above specs need a 'threshold'")
+    name, start, end = spec['window']
+    if start > end:
+        raise ValueError(f"Window {name!r} must not wrap the year end")
+
+
+def _day_of_year(years, month_day):
+    """Day of year of 'MM-DD' in each of `years` (leap years shift dates after Feb 28)."""
+    month, day = (int(p) for p in month_day.split('-'))
+    year_start = (years - 1970).astype('datetime64[Y]')
+    dates = (year_start.astype('datetime64[M]') + (month - 1)).astype('datetime64[D]') + (day - 1)
+    return (dates - year_start.astype('datetime64[D]')).astype('int64') + 1
+
+
+def _series_key(spec):
+    """Identifies the daily series a spec reduces, so specs sharing one reuse its cumsum."""
+    stat = spec['stat']
+    if stat == 'gdd':
+        cap = spec.get('cap')
+        return ('gdd', float(spec['base']), None if cap is None else float(cap))
+    if stat == 'days_above':
+        return ('above', spec['var'], float(spec['threshold']))
+    return ('var', spec['var'])
+
+
+def _series_values(daily_df, key):
+    """Daily values of a series; NaN where the inputs are missing."""
+    tmax = daily_df['tmax'].to_numpy(dtype='float64')
+    tmin = daily_df['tmin'].to_numpy(dtype='float64')
+    if key[0] == 'gdd':
+        _, base, cap = key
+        if cap is None:
+            return np.clip((tmax + tmin) / 2 - base, 0, None)
+        # Capped method: temperatures limited to [base, cap] before averaging
+        return (np.clip(tmax, base, cap) + np.clip(tmin, base, cap)) / 2 - base
+    var = key[1]
+    values = (tmax + tmin) / 2 if var == 'tavg' else daily_df[var].to_numpy(dtype='float64')
+    if key[0] == 'above':
+        return np.where(np.isnan(values), np.nan, values >= key[2])
+    return values
+
+
+def window_features(daily_df, specs=None):
+    """
+    Computes every feature in `specs` (default DEFAULT_FEATURE_SPECS) for each
+    (State, County, Year) of `daily_df` and returns one wide row per
+    county-year: State, County, Year and one column per spec.
+
+    Daily rows are sorted once and each distinct daily series gets a single
+    cumulative-sum array, so any window total is cs[hi] - cs[lo] with hi/lo
+    found by one searchsorted over all county-years. Windows without valid
+    days come out as NaN.
+    """
+    specs = list(DEFAULT_FEATURE_SPECS if specs is None else specs)
+    for spec in specs:
+        _validate_spec(spec)
+    names = [feature_name(spec) for spec in specs]
+    if daily_df is None or daily_df.empty:
+        return pd.DataFrame(columns=GROUP_COLS + names)
+
+    df = daily_df.sort_values(GROUP_COLS + ['DayOfYear'], kind='stable')
+    group_id = df.groupby(GROUP_COLS, sort=True).ngroup().to_numpy(dtype='int64')
+    # Monotonic search key: group, then day of year
+    keys = group_id * 400 + df['DayOfYear'].to_numpy(dtype='int64')
+    first = np.flatnonzero(np.r_[True, group_id[1:] != group_id[:-1]])
+    groups = df[GROUP_COLS].iloc[first].reset_index(drop=True)
+    gids = group_id[first]
+    years = groups['Year'].to_numpy(dtype='int64')
+
+    bounds = {}
+    cumsums = {}
+    out = {col: groups[col].to_numpy() for col in GROUP_COLS}
+    for spec, name in zip(specs, names):
+        window = tuple(spec['window'])
+        if window not in bounds:
+            _, start, end = window
+            lo = np.searchsorted(keys, gids * 400 + _day_of_year(years, start), 'left')
+            hi = np.searchsorted(keys, gids * 400 + _day_of_year(years, end), 'right')
+            bounds[window] = (lo, hi)
+        lo, hi = bounds[window]
+        series_key = _series_key(spec)
+        if series_key not in cumsums:
+            values = _series_values(df, series_key)
+            valid = ~np.isnan(values)
+            cumsums[series_key] = (
+                np.concatenate([[0.0], np.cumsum(np.where(valid, values, 0.0))]),
+                np.concatenate([[0], np.cumsum(valid)]),
+            )
+        cs, cn = cumsums[series_key]
+        total = cs[hi] - cs[lo]
+        n = cn[hi] - cn[lo]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out[name] = np.where(n > 0, total / n if spec['stat'] == 'mean' else total, np.nan)
+    return pd.DataFrame(out)
@@ -0,0 +1,208 @@
+"""
+Local columnar store for daily Daymet weather.
+
+Daily frames returned by fetch_and_transform_weather are written to a Parquet
+dataset partitioned by State/County/Year (hive layout), so new seasonal
+aggregates can be recomputed from disk without touching the network.
+
+The store root defaults to `data/daily_weather` in the repo and can be moved
+with the DAILY_WEATHER_DIR environment variable.
+
+Multi-window agronomic features (see weather_features.window_features) are
+kept next to it as a wide county-year table, a Parquet dataset partitioned by
+State/County under `data/weather_features` (WEATHER_FEATURES_DIR). Its columns
+follow whatever feature specs were used, so trying a new window only means
+recomputing from the daily store.
+"""
+import os
+
+import pandas as pd
+
+from backend.ingest.weather_features import annual_growing_season_features, window_features
+
+PARTITION_COLS = ['State', 'County', 'Year']
+FEATURE_PARTITION_COLS = ['State', 'County']
+
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(__file__), '../../data/daily_weather')
+DEFAULT_FEATURES_DIR = os.path.join(os.path.dirname(__file__), '../../data/weather_features')
+
+
+def get_store_dir():
+    """Returns the root directory of the daily weather dataset."""
+    return os.path.abspath(os.environ.get('DAILY_WEATHER_DIR', DEFAULT_STORE_DIR))
+
+
+def get_features_dir():
+    """Returns the root directory of the wide weather feature table."""
+    return os.path.abspath(os.environ.get('WEATHER_FEATURES_DIR', DEFAULT_FEATURES_DIR))
+
+
+def _filters(state=None, county=None, start_year=None, end_year=None):
+    filters = []
+    if state:
+        filters.append(('State', '=', str(state).strip().upper()))
+    if county:
+        filters.append(('County', '=', str(county).strip().upper()))
+    if start_year is not None:
+        filters.append(('Year', '>=', int(start_year)))
+    if end_year is not None:
+        filters.append(('Year', '<=', int(end_year)))
+    return filters or None
+
+
+def write_daily_weather(daily_df, root=None):
+    """
+    Writes daily weather rows (must carry State, County and Year columns) to
+    the store. Existing State/County/Year partitions present in `daily_df` are
+    replaced, others are left untouched. Returns the number of rows written.
+    """
+    if daily_df is None or daily_df.empty:
+        return 0
+    root = root or get_store_dir()
+    os.makedirs(root, exist_ok=True)
+    out = daily_df.reset_index(drop=True).copy()
+    out['State'] = out['State'].astype(str).str.strip().str.upper()
+    out['County'] = out['County'].astype(str).str.strip().str.upper()
+    out['Year'] = out['Year'].astype(int)
+    out.to_parquet(
+        root,
+        engine='pyarrow',
+        index=False,
+        partition_cols=PARTITION_COLS,
+        existing_data_behavior='delete_matching',
+    )
+    return len(out)
+
+
+def read_daily_weather(state=None, county=None, start_year=None, end_year=None, columns=None, root=None):
+    """
+    Reads daily weather rows from the store, pruning partitions by state,
+    county and year range. Returns an empty DataFrame if nothing is stored.
+    """
+    root = root or get_store_dir()
+    if not os.path.isdir(root):
+        return pd.DataFrame()
+    if columns is not None:
+        columns = list(dict.fromkeys(list(columns) + PARTITION_COLS))
+    try:
+        df = pd.read_parquet(
+            root,
+            engine='pyarrow',
+            columns=columns,
+            filters=_filters(state, county, start_year, end_year),
+        )
+    except (FileNotFoundError, ValueError):
+        return pd.DataFrame()
+    if df.empty:
+        return df
+    # Partition columns come back as categoricals
+    df['State'] = df['State'].astype(str)
+    df['County'] = df['County'].astype(str)
+    df['Year'] = df['Year'].astype(int)
+    return df
+
+
+def compute_annual_weather(state, county=None, start_year=None, end_year=None, root=None):
+    """
+    Recomputes annual growing-season weather features from stored daily data
+    only (no network access). Covers every stored county of `state` when
+    `county` is None. Returns a DataFrame shaped like fetch_and_transform_weather's
+    annual output.
+    """
+    daily = read_daily_weather(state, county, start_year, end_year, root=root)
+    if daily.empty:
+        print(f"  - No stored daily weather for {county or 'all counties'}, {state}.")
+        return pd.DataFrame()
+    # One grouped pass over every stored county-year
+    return annual_growing_season_features(daily)
+
+
+def write_weather_features(features_df, root=None):
+    """
+    Writes wide county-year feature rows (State, County, Year + feature
+    columns) to the feature table. Rows for the same county and year are
+    replaced, other years of that county are kept. Returns rows written.
+    """
+    if features_df is None or features_df.empty:
+        return 0
+    root = root or get_features_dir()
+    os.makedirs(root, exist_ok=True)
+    out = features_df.reset_index(drop=True).copy()
+    out['State'] = out['State'].astype(str).str.strip().str.upper()
+    out['County'] = out['County'].astype(str).str.strip().str.upper()
+    out['Year'] = out['Year'].astype(int)
+    # Partitions are rewritten whole, so carry over the years not being replaced
+    frames = [out]
+    for (state, county), years in out.groupby(FEATURE_PARTITION_COLS)['Year']:
+        existing = read_weather_features(state, county, root=root)
+        if not existing.empty:
+            frames.append(existing[~existing['Year'].isin(years)])
+    merged = pd.concat(frames, ignore_index=True).sort_values(FEATURE_PARTITION_COLS + ['Year'])
+    merged.to_parquet(
+        root,
+        engine='pyarrow',
+        index=False,
+        partition_cols=FEATURE_PARTITION_COLS,
+        existing_data_behavior='delete_matching',
+    )
+    return len(out)
+
+
+def read_weather_features(state=None, county=None, start_year=None, end_year=None, columns=None, root=None):
+    """
+    Reads wide county-year feature rows, pruning partitions by state and
+    county. Returns an empty DataFrame if nothing is stored.
+    """
+    root = root or get_features_dir()
+    if not os.path.isdir(root):
+        return pd.DataFrame()
+    if columns is not None:
+        columns = list(dict.fromkeys(list(columns) + PARTITION_COLS))
+    try:
+        df = pd.read_parquet(
+            root,
+            engine='pyarrow',
+            columns=columns,
+            filters=_filters(state, county, start_year, end_year),
+        )
+    except (FileNotFoundError, ValueError):
+        return pd.DataFrame()
+    if df.empty:
+        return df
+    df['State'] = df['State'].astype(str)
+    df['County'] = df['County'].astype(str)
+    return df.sort_values(PARTITION_COLS).reset_index(drop=True)
+
+
+def compute_weather_features(state, county=None, start_year=None, end_year=None, specs=None, root=None):
+    """
+    Computes the wide multi-window feature table from stored daily data only
+    (no network access), for every stored county of `state` when `county` is
+    None. `specs` defaults to weather_features.DEFAULT_FEATURE_SPECS.
+    """
+    daily = read_daily_weather(state, county, start_year, end_year, root=root)
+    if daily.empty:
+        print(f"  - No stored daily weather for {county or 'all counties'}, {state}.")
+        return pd.DataFrame()
+    return window_features(daily, specs)
+
+
+if __name__ == "__main__":
+    import argparse
+    from sqlalchemy import create_engine
+    parser = argparse.ArgumentParser(description="Recompute annual weather features from the local daily store")
+    parser.add_argument('--state', required=True)
+    parser.add_argument('--county')
+    parser.add_argument('--start_year', type=int)
+    parser.add_argument('--end_year', type=int)
+    parser.add_argument('--features', action='store_true',
+                        help="rebuild the wide multi-window feature table instead of the weather table")
+    parser.add_argument('--db', default=os.environ.get("DATABASE_URL", "sqlite:///mlplayground.db"))
+    args = parser.parse_args()
+    if args.features:
+        features_df = compute_weather_features(args.state, args.county, args.start_year, args.end_year)
+        print(f"Wrote {write_weather_features(features_df)} county-year feature rows to {get_features_dir()}")
+    else:
+        annual_df = compute_annual_weather(args.state, args.county, args.start_year, args.end_year)
+        from backend.ingest.runner import upsert_weather_to_db
+        upsert_weather_to_db(annual_df, create_engine(args.db))
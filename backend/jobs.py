@@ -0,0 +1,116 @@
+"""
+In-process background job pool for upstream backfills.
+
+Endpoints that would otherwise call NASS or read the local CSV while the
+request is held open submit the work here instead and return at once with
+the job id; clients poll `GET /jobs/{id}` for its status:
+
+    job = submit_job('yield_backfill', {'state': 'IOWA', ...}, fn, *args)
+    response.headers[JOB_HEADER] = job['id']
+
+A job with the same kind and params as one that is still queued or running
+is not submitted twice; the existing job is returned. Finished jobs are kept
+in memory (the newest MAX_FINISHED_JOBS) so their status can still be read.
+
+Environment:
+    BACKFILL_WORKERS  worker threads running jobs (default 2)
+"""
+import os
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import APIRouter, HTTPException
+
+router = APIRouter()
+
+JOB_HEADER = 'X-Backfill-Job'
+
+DEFAULT_WORKERS = 2
+MAX_FINISHED_JOBS = 500
+
+_executor = None
+_jobs = OrderedDict()
+_active = {}
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            workers = int(os.environ.get('BACKFILL_WORKERS', DEFAULT_WORKERS))
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='backfill')
+        return _executor
+
+
+def _dedup_key(kind, params):
+    return (kind, tuple(sorted(params.items())))
+
+
+def _prune():
+    finished = [job_id for job_id, job in _jobs.items() if job['status'] in ('succeeded', 'failed')]
+    for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+        del _jobs[job_id]
+
+
+def _run(job, key, fn, args):
+    with _lock:
+        job['status'] = 'running'
+        job['started_at'] = time.time()
+    try:
+        result, status, error = fn(*args), 'succeeded', None
+    except Exception as e:
+        traceback.print_exc()
+        result, status, error = None, 'failed', f'{type(e).__name__}: {e}'
+    with _lock:
+        job.update(status=status, result=result, error=error, finished_at=time.time())
+        _active.pop(key, None)
+        _prune()
+
+
+def submit_job(kind, params, fn, *args):
+    """
+    Queues fn(*args) on the worker pool and returns a copy of its job record.
+    Returns the existing job instead when an identical one is still pending.
+    """
+    key = _dedup_key(kind, params)
+    executor = _get_executor()
+    with _lock:
+        existing = _active.get(key)
+        if existing is not None:
+            return dict(existing)
+        job = {
+            'id': uuid.uuid4().hex,
+            'kind': kind,
+            'params': dict(params),
+            'status': 'queued',
+            'submitted_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'result': None,
+            'error': None,
+        }
+        _jobs[job['id']] = job
+        _active[key] = job
+    executor.submit(_run, job, key, fn, args)
+    return dict(job)
+
+
+def get_job(job_id):
+    """Returns a copy of a job record, or None if unknown or pruned."""
+    with _lock:
+        job = _jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+
+@router.get("/jobs/{job_id}")
+def get_job_status(job_id: str):
+    """Status of a background job: queued, running, succeeded or failed."""
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return job
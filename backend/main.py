@@ -1,13 +1,42 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
 from backend.weather import router as weather_router
 from backend.yields import router as yields_router
 from backend.soil import router as soil_router
+from backend.dataset import router as dataset_router
+from backend.jobs import router as jobs_router
+from backend.database import get_engine, pool_stats
+from backend.result_cache import cache_stats, result_cache_middleware, start_listener
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Writes from other processes (the ingest CLI) invalidate cached results via Postgres NOTIFY
+    start_listener(get_engine())
+    yield
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+app.middleware("http")(result_cache_middleware)
 
 
 # Register routers
 app.include_router(yields_router)
 app.include_router(weather_router)
 app.include_router(soil_router)
+app.include_router(dataset_router)
+app.include_router(jobs_router)
+
+
+@app.get("/health/db")
+def get_db_health():
+    """Connection pool occupancy and cumulative checkout/wait statistics."""
+    return pool_stats()
+
+
+@app.get("/health/cache")
+def get_cache_health():
+    """Result cache size and hit/miss/eviction/invalidation counters."""
+    return cache_stats()
@@ -0,0 +1,56 @@
+"""
+Keyset pagination and column projection shared by the data endpoints.
+
+Pages are ordered by primary key and continued with `cursor`, the last id of
+the previous page (WHERE id > cursor ORDER BY id LIMIT n), so every page is
+an index range scan no matter how deep the client has paged. When a page is
+full, the id to continue from is returned in the `X-Next-Cursor` header and
+the body stays a plain JSON list.
+
+`fields=year,county,value` selects only those columns in SQL; `id` is always
+included so the cursor can be followed.
+"""
+from fastapi import HTTPException
+from sqlalchemy import select
+
+MAX_PAGE_SIZE = 50000
+
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+
+def model_fields(model):
+    """Names of the columns an endpoint can return for `model`."""
+    return [c.name for c in model.__table__.columns]
+
+
+def parse_fields(model, fields):
+    """
+    Resolves a comma-separated `fields` value to the model's columns (all
+    columns when empty). Raises HTTPException 400 for unknown names.
+    """
+    available = model_fields(model)
+    if not fields:
+        return [getattr(model, name) for name in available]
+    requested = [f.strip() for f in fields.split(',') if f.strip()]
+    unknown = [f for f in requested if f not in available]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields {unknown}; available: {available}")
+    names = ['id'] + [f for f in dict.fromkeys(requested) if f != 'id']
+    return [getattr(model, name) for name in names]
+
+
+def page_query(model, columns, cursor=None, limit=None):
+    """SELECT of `columns` ordered by id, starting after `cursor`, at most `limit` rows."""
+    query = select(*columns).order_by(model.id)
+    if cursor is not None:
+        query = query.where(model.id > cursor)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def next_cursor_headers(count, last_id, limit):
+    """Headers for a page of `count` rows: X-Next-Cursor when the page is full."""
+    if limit is not None and count == limit:
+        return {NEXT_CURSOR_HEADER: str(last_id)}
+    return {}
@@ -0,0 +1,267 @@
+"""
+In-process result cache for the read endpoints, with ETag revalidation.
+
+Successful GET responses of the data endpoints that were rendered in one
+piece (paged requests, Parquet, summaries) are kept in a size-bounded LRU
+keyed on the path and the normalized query string. Streamed responses
+(unpaged JSON, NDJSON and Arrow, see backend/formats.py) are never
+buffered or cached, so they keep a flat memory profile and an early first
+byte; clients that want them cached can page with `limit`. Every cached body
+carries an ETag; a request with a matching If-None-Match gets a bodiless
+304, so Streamlit reruns that repeat a query neither hit the database nor
+download the rows again.
+
+Responses that queued a backfill job (X-Backfill-Job, see backend/jobs.py)
+are not cached, so every such request queues its job and gets a current id.
+
+Invalidation is driven by writes: bulk_upsert() (backend/ingest/runner.py)
+calls invalidate(table, states) after each batch, which drops every entry
+that reads that table for one of those states or for all states. On
+Postgres the upsert also sends a NOTIFY on the `result_cache` channel, and
+the API process LISTENs for it, so writes from a separately running ingest
+CLI invalidate the API's cache too. RESULT_CACHE_TTL bounds staleness when
+neither path is available.
+
+Environment:
+    RESULT_CACHE_MAX_BYTES        total cached body size, 0 disables the cache (default 128 MiB)
+    RESULT_CACHE_MAX_ENTRY_BYTES  larger responses are passed through uncached (default 16 MiB)
+    RESULT_CACHE_TTL              seconds an entry may be served, 0 for no expiry (default 600)
+    RESULT_CACHE_NOTIFY           set to 0 to disable the Postgres LISTEN/NOTIFY channel (default 1)
+"""
+import hashlib
+import os
+import select
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import Request, Response
+from sqlalchemy import text
+
+from backend.jobs import JOB_HEADER
+
+DEFAULT_MAX_BYTES = 128 * 1024 * 1024
+DEFAULT_MAX_ENTRY_BYTES = 16 * 1024 * 1024
+DEFAULT_TTL = 600
+
+NOTIFY_CHANNEL = 'result_cache'
+CACHE_STATUS_HEADER = 'X-Cache'
+
+# Endpoint path -> tables its responses are read from
+CACHED_PATHS = {
+    '/yields/': ('yields',),
+    '/weather/': ('weather',),
+    '/soil/': ('soil',),
+    '/dataset/': ('yields', 'weather', 'soil'),
+    '/yields/summary': ('yields',),
+    '/weather/summary': ('weather',),
+}
+
+# Tables read by at least one cached path; writes to other tables cannot make an entry stale
+CACHED_TABLES = frozenset(t for tables in CACHED_PATHS.values() for t in tables)
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+class ResultCache:
+    """LRU of rendered responses, bounded by the total size of the bodies."""
+
+    def __init__(self, max_bytes, ttl):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Bumped by every invalidation, so a response computed before a write is not stored after it
+        self.generation = 0
+        self.stats = {'hits': 0, 'misses': 0, 'not_modified': 0, 'evictions': 0, 'invalidations': 0}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl and time.monotonic() - entry['stored_at'] > self.ttl:
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry
+
+    def put(self, key, entry, generation):
+        size = len(entry['body'])
+        with self._lock:
+            if generation != self.generation or size > self.max_bytes:
+                return
+            if key in self._entries:
+                self._drop(key)
+            entry['stored_at'] = time.monotonic()
+            self._entries[key] = entry
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.stats['evictions'] += 1
+
+    def count_not_modified(self):
+        with self._lock:
+            self.stats['not_modified'] += 1
+
+    def _drop(self, key):
+        self._bytes -= len(self._entries.pop(key)['body'])
+
+    def invalidate(self, table, states=None):
+        """Drops entries reading `table` for any of `states` (all entries of the table when None)."""
+        states = {s.upper() for s in states if s} if states is not None else None
+        with self._lock:
+            stale = [key for key, entry in self._entries.items()
+                     if table in entry['tables']
+                     and (states is None or entry['state'] is None or entry['state'] in states)]
+            if stale or table in CACHED_TABLES:
+                self.generation += 1
+            for key in stale:
+                self._drop(key)
+            self.stats['invalidations'] += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def info(self):
+        with self._lock:
+            return dict(self.stats, entries=len(self._entries), bytes=self._bytes,
+                        max_bytes=self.max_bytes, ttl=self.ttl)
+
+
+_cache = ResultCache(_env_int('RESULT_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES),
+                     _env_int('RESULT_CACHE_TTL', DEFAULT_TTL))
+
+
+def invalidate(table, states=None):
+    """Drops cached responses that read `table` for `states` (an iterable of state names, or None for all)."""
+    _cache.invalidate(table, states)
+
+
+def cache_stats():
+    """Entry count, size and hit/miss/eviction counters of the result cache."""
+    return _cache.info()
+
+
+def notify_invalidation(conn, table, states):
+    """
+    Sends the invalidation over Postgres NOTIFY on `conn`; it is delivered
+    to listening API processes when the surrounding transaction commits.
+    """
+    if conn.dialect.name != 'postgresql':
+        return
+    # NOTIFY payloads are capped at 8000 bytes; fall back to the whole table
+    payload = f"{table}:{','.join(sorted({s.upper() for s in states if s}))}"
+    if len(payload) > 7900:
+        payload = f'{table}:'
+    conn.execute(text('SELECT pg_notify(:channel, :payload)'), {'channel': NOTIFY_CHANNEL, 'payload': payload})
+
+
+def _apply_notification(payload):
+    table, _, states = payload.partition(':')
+    invalidate(table, states.split(',') if states else None)
+
+
+def _listen(engine):
+    """LISTEN loop on a dedicated connection; reconnects (and clears the cache) after errors."""
+    while True:
+        try:
+            raw = engine.raw_connection()
+            raw.detach()
+            dbapi_conn = raw.driver_connection
+            dbapi_conn.autocommit = True
+            with dbapi_conn.cursor() as cur:
+                cur.execute(f'LISTEN {NOTIFY_CHANNEL}')
+            # Notifications may have been missed while disconnected
+            _cache.clear()
+            while True:
+                if select.select([dbapi_conn], [], [], 30) == ([], [], []):
+                    continue
+                dbapi_conn.poll()
+                while dbapi_conn.notifies:
+                    _apply_notification(dbapi_conn.notifies.pop(0).payload)
+        except Exception as e:
+            print(f"Result cache listener error ({e}); reconnecting in 5s.")
+            _cache.clear()
+            time.sleep(5)
+
+
+def start_listener(engine):
+    """Starts the cross-process invalidation listener when the database is Postgres."""
+    if engine.dialect.name != 'postgresql' or os.environ.get('RESULT_CACHE_NOTIFY', '1') == '0':
+        return None
+    thread = threading.Thread(target=_listen, args=(engine,), name='result-cache-listener', daemon=True)
+    thread.start()
+    return thread
+
+
+def cache_key(request):
+    """Path plus the query parameters sorted by name, ignoring empty values."""
+    params = tuple(sorted((k, v.strip()) for k, v in request.query_params.multi_items() if v.strip()))
+    return request.url.path, params
+
+
+def _etag(body):
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _etag_matches(request, etag):
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    return header.strip() == '*' or etag in [t.strip() for t in header.split(',')]
+
+
+def _render(request, entry, status):
+    headers = dict(entry['headers'], etag=entry['etag'])
+    headers[CACHE_STATUS_HEADER] = status
+    if _etag_matches(request, entry['etag']):
+        _cache.count_not_modified()
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry['body'], status_code=200, headers=headers, media_type=entry['media_type'])
+
+
+async def result_cache_middleware(request: Request, call_next):
+    """HTTP middleware serving CACHED_PATHS from the result cache."""
+    tables = CACHED_PATHS.get(request.url.path)
+    if request.method != 'GET' or tables is None or not _cache.max_bytes:
+        return await call_next(request)
+    key = cache_key(request)
+    entry = _cache.get(key)
+    if entry is not None:
+        return _render(request, entry, 'HIT')
+
+    generation = _cache.generation
+    response = await call_next(request)
+    if response.status_code != 200:
+        return response
+    if JOB_HEADER in response.headers:
+        # The endpoint queued a backfill: its job id is per request, and a hit would skip queueing it
+        return response
+    # Only bodies rendered in one piece (paged pages, Parquet, summaries) carry a Content-Length.
+    # Streamed bodies pass straight through: buffering them would hold the whole body in memory
+    # and delay the first byte until the last one
+    length = response.headers.get('content-length')
+    if length is None or int(length) > _env_int('RESULT_CACHE_MAX_ENTRY_BYTES', DEFAULT_MAX_ENTRY_BYTES):
+        return response
+    body = b''.join([chunk async for chunk in response.body_iterator])
+    headers = {k: v for k, v in response.headers.items() if k.lower() not in ('content-length', JOB_HEADER.lower())}
+    state = request.query_params.get('state')
+    entry = {
+        'body': body,
+        'headers': headers,
+        'media_type': response.media_type,
+        'etag': _etag(body),
+        'tables': tables,
+        'state': state.strip().upper() if state and state.strip() else None,
+    }
+    _cache.put(key, entry, generation)
+    return _render(request, entry, 'MISS')
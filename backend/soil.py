@@ -1,37 +1,28 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, Query, Response
 from typing import Optional
-from sqlalchemy import create_engine, select
 from sqlalchemy.orm import Session
 from db.models import Soil
-import os
+from backend.database import get_session
+from backend.pagination import MAX_PAGE_SIZE, page_query, parse_fields
+from backend.formats import FORMAT_PATTERN, STREAM_OPTIONS, format_response
 
 router = APIRouter()
 
-DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///mlplayground.db")
-engine = create_engine(DATABASE_URL)
-
 @router.get("/soil/")
 def get_soil(
+    response: Response,
     state: Optional[str] = Query(None),
-    county: Optional[str] = Query(None)
+    county: Optional[str] = Query(None),
+    cursor: Optional[int] = Query(None, ge=0, description="id of the last row of the previous page"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="page size (default: all rows)"),
+    fields: Optional[str] = Query(None, description="comma-separated columns, e.g. county,ph"),
+    fmt: str = Query('json', alias='format', pattern=FORMAT_PATTERN, description="json, ndjson, arrow or parquet"),
+    session: Session = Depends(get_session),
 ):
-    with Session(engine) as session:
-        query = select(Soil)
-        if state:
-            query = query.where(Soil.state == state)
-        if county:
-            query = query.where(Soil.county == county)
-        results = session.execute(query).scalars().all()
-        return [
-            {
-                "id": s.id,
-                "state": s.state,
-                "county": s.county,
-                "ph": s.ph,
-                "organic_matter": s.organic_matter,
-                "sand_pct": s.sand_pct,
-                "clay_pct": s.clay_pct,
-                # Add more fields as needed
-            }
-            for s in results
-        ]
+    columns = parse_fields(Soil, fields)
+    query = page_query(Soil, columns, cursor, limit)
+    if state:
+        query = query.where(Soil.state == state)
+    if county:
+        query = query.where(Soil.county == county)
+    return format_response(session.execute(query, execution_options=STREAM_OPTIONS), columns, fmt, response, limit)
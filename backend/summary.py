@@ -0,0 +1,111 @@
+"""
+Grouped summary statistics computed in SQL for the /yields/summary and
+/weather/summary endpoints.
+
+For every group (e.g. state, county, crop) and summarized column the query
+returns count, mean, sample standard deviation, min, max and the linear
+trend per year (least-squares slope of the value over year), plus the
+first and last year, so clients get one row per group instead of every
+raw row. On Postgres these are the native aggregates (stddev_samp,
+regr_slope); other dialects, SQLite among them, have neither, so the query
+returns count and the moment sums and the standard deviation and slope are
+finished in Python from those per-group sums.
+"""
+import math
+
+from fastapi import HTTPException
+from sqlalchemy import case, func, select
+
+STATS = ('count', 'mean', 'stddev', 'min', 'max', 'slope')
+
+# Years are centered on this origin in the moment sums to keep them well conditioned
+YEAR_ORIGIN = 2000
+
+
+def parse_group_by(model, group_by, allowed, default):
+    """
+    Resolves a comma-separated `group_by` value to model columns, in the
+    given order. Raises HTTPException 400 for names not in `allowed`.
+    """
+    names = [g.strip() for g in (group_by or default).split(',') if g.strip()]
+    unknown = [g for g in names if g not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Cannot group by {unknown}; allowed: {list(allowed)}")
+    return [getattr(model, name) for name in dict.fromkeys(names)]
+
+
+def _native_aggregates(x, year, prefix):
+    return [
+        func.count(x).label(f'{prefix}count'),
+        func.avg(x).label(f'{prefix}mean'),
+        func.stddev_samp(x).label(f'{prefix}stddev'),
+        func.min(x).label(f'{prefix}min'),
+        func.max(x).label(f'{prefix}max'),
+        func.regr_slope(x, year).label(f'{prefix}slope'),
+    ]
+
+
+def _moment_aggregates(x, year, prefix):
+    # Years of rows where x is NULL are left out, as regr_slope does
+    t = case((x.is_not(None), year - YEAR_ORIGIN))
+    return [
+        func.count(x).label(f'{prefix}count'),
+        func.avg(x).label(f'{prefix}mean'),
+        func.min(x).label(f'{prefix}min'),
+        func.max(x).label(f'{prefix}max'),
+        func.sum(x).label(f'{prefix}_sx'),
+        func.sum(x * x).label(f'{prefix}_sxx'),
+        func.sum(t).label(f'{prefix}_st'),
+        func.sum(t * t).label(f'{prefix}_stt'),
+        func.sum(t * x).label(f'{prefix}_stx'),
+    ]
+
+
+def _finish_moments(row, prefix):
+    """Adds stddev and slope computed from the moment sums, and drops the sums."""
+    n = row[f'{prefix}count']
+    sx, sxx = row.pop(f'{prefix}_sx'), row.pop(f'{prefix}_sxx')
+    st, stt, stx = row.pop(f'{prefix}_st'), row.pop(f'{prefix}_stt'), row.pop(f'{prefix}_stx')
+    row[f'{prefix}stddev'] = None
+    row[f'{prefix}slope'] = None
+    if n and n > 1:
+        row[f'{prefix}stddev'] = math.sqrt(max((sxx - sx * sx / n) / (n - 1), 0.0))
+        denominator = n * stt - st * st
+        if denominator:
+            row[f'{prefix}slope'] = (n * stx - st * sx) / denominator
+
+
+def summary_query(model, group_columns, variables, filters, native=True):
+    """
+    SELECT of the group columns, first/last year and the aggregates of each
+    `variables` column (a {output prefix: column} mapping), one row per group.
+    """
+    aggregates = _native_aggregates if native else _moment_aggregates
+    columns = list(group_columns) + [
+        func.min(model.year).label('first_year'),
+        func.max(model.year).label('last_year'),
+    ]
+    for prefix, column in variables.items():
+        columns += aggregates(column, model.year, prefix)
+    query = select(*columns).where(*filters)
+    if group_columns:
+        query = query.group_by(*group_columns).order_by(*group_columns)
+    return query
+
+
+def summarize(session, model, group_columns, variables, filters):
+    """Runs summary_query on `session` and returns the groups as a list of dicts."""
+    native = session.get_bind().dialect.name == 'postgresql'
+    rows = [dict(row) for row in
+            session.execute(summary_query(model, group_columns, variables, filters, native)).mappings()]
+    order = [c.name for c in group_columns] + ['first_year', 'last_year'] + [
+        f'{prefix}{stat}' for prefix in variables for stat in STATS]
+    for row in rows:
+        if not native:
+            for prefix in variables:
+                _finish_moments(row, prefix)
+        for prefix in variables:
+            for stat in ('mean', 'stddev', 'slope'):
+                if row[f'{prefix}{stat}'] is not None:
+                    row[f'{prefix}{stat}'] = float(row[f'{prefix}{stat}'])
+    return [{name: row[name] for name in order} for row in rows]
@@ -1,42 +1,69 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from typing import Optional
-from sqlalchemy import create_engine, select
 from sqlalchemy.orm import Session
 from db.models import Weather
-import os
+from backend.database import get_session
+from backend.pagination import MAX_PAGE_SIZE, page_query, parse_fields
+from backend.formats import FORMAT_PATTERN, STREAM_OPTIONS, format_response
+from backend.summary import parse_group_by, summarize
 
 router = APIRouter()
 
-DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///mlplayground.db")
-engine = create_engine(DATABASE_URL)
+# Columns /weather/summary can group by, and the variables it can summarize
+WEATHER_GROUPS = ('state', 'county')
+WEATHER_VARIABLES = ('avg_temp', 'precipitation', 'vp', 'srad', 'gdd')
 
 @router.get("/weather/")
 def get_weather(
+    response: Response,
     state: Optional[str] = Query(None),
     county: Optional[str] = Query(None),
-    year: Optional[int] = Query(None)
+    year: Optional[int] = Query(None),
+    cursor: Optional[int] = Query(None, ge=0, description="id of the last row of the previous page"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="page size (default: all rows)"),
+    fields: Optional[str] = Query(None, description="comma-separated columns, e.g. year,county,gdd"),
+    fmt: str = Query('json', alias='format', pattern=FORMAT_PATTERN, description="json, ndjson, arrow or parquet"),
+    session: Session = Depends(get_session),
 ):
-    with Session(engine) as session:
-        query = select(Weather)
-        if state:
-            query = query.where(Weather.state == state)
-        if county:
-            query = query.where(Weather.county == county)
-        if year:
-            query = query.where(Weather.year == year)
-        results = session.execute(query).scalars().all()
-        return [
-            {
-                "id": w.id,
-                "year": w.year,
-                "state": w.state,
-                "county": w.county,
-                "avg_temp": w.avg_temp,
-                "precipitation": w.precipitation,
-                "vp": w.vp,
-                "srad": w.srad,
-                "gdd": w.gdd
-                # Add more fields as needed
-            }
-            for w in results
-        ]
+    columns = parse_fields(Weather, fields)
+    query = page_query(Weather, columns, cursor, limit)
+    if state:
+        query = query.where(Weather.state == state)
+    if county:
+        query = query.where(Weather.county == county)
+    if year:
+        query = query.where(Weather.year == year)
+    return format_response(session.execute(query, execution_options=STREAM_OPTIONS), columns, fmt, response, limit)
+
+
+@router.get("/weather/summary")
+def get_weather_summary(
+    state: Optional[str] = Query(None),
+    county: Optional[str] = Query(None),
+    start_year: Optional[int] = Query(None),
+    end_year: Optional[int] = Query(None),
+    group_by: Optional[str] = Query(None, description="comma-separated, from state,county (default state,county)"),
+    variables: Optional[str] = Query(None, description="comma-separated, e.g. gdd,precipitation (default all)"),
+    session: Session = Depends(get_session),
+):
+    """
+    Annual weather statistics per group, computed in SQL: for each variable
+    count, mean, stddev, min, max and the linear trend (slope per year),
+    as <variable>_<stat> columns.
+    """
+    group_columns = parse_group_by(Weather, group_by, WEATHER_GROUPS, 'state,county')
+    names = [v.strip() for v in (variables or ','.join(WEATHER_VARIABLES)).split(',') if v.strip()]
+    unknown = [v for v in names if v not in WEATHER_VARIABLES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown variables {unknown}; available: {list(WEATHER_VARIABLES)}")
+    filters = []
+    if state:
+        filters.append(Weather.state == state)
+    if county:
+        filters.append(Weather.county == county)
+    if start_year:
+        filters.append(Weather.year >= start_year)
+    if end_year:
+        filters.append(Weather.year <= end_year)
+    summarized = {f'{name}_': getattr(Weather, name) for name in dict.fromkeys(names)}
+    return summarize(session, Weather, group_columns, summarized, filters)
@@ -1,18 +1,29 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, Query, Response
+import pandas as pd
 from typing import Optional
-from sqlalchemy import create_engine, select, and_
+from sqlalchemy import Integer, cast, func, literal, select, true
 from sqlalchemy.orm import Session
 from db.models import Yield
+from backend.database import get_engine, get_session
+from backend.pagination import MAX_PAGE_SIZE, page_query, parse_fields
+from backend.formats import FORMAT_PATTERN, STREAM_OPTIONS, format_response
 from backend.ingest.runner import upsert_yield_to_db
-from backend.ingest.crop_nass import fetch_and_transform_yield, fetch_and_transform_yield_csv_fallback
+from backend.ingest.crop_nass import (
+    fetch_and_transform_yield, fetch_and_transform_yield_csv_fallback, fetch_and_transform_yield_state,
+)
 from backend.config import get_nass_api_key
 from backend.ingest.runner import get_counties_for_state
-import os
+from backend.jobs import JOB_HEADER, submit_job
+from backend.dataset import EXCLUDED_COUNTIES
+from backend.summary import parse_group_by, summarize
 
 router = APIRouter()
 
-DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///mlplayground.db")
-engine = create_engine(DATABASE_URL)
+# Counties with gaps in one state above which one statewide NASS query replaces per-county queries
+STATEWIDE_MIN_COUNTIES = 5
+
+# Columns /yields/summary can group by
+YIELD_GROUPS = ('state', 'district', 'county', 'crop')
 
 def get_contiguous_ranges(years):
     """
@@ -41,123 +52,220 @@ def get_contiguous_ranges(years):
     ranges.append((range_start, range_end))
     return ranges
 
+def _fetch_state_yield(state, crop, start_year, end_year, api_key):
+    """
+    Fetches a whole state's yields for a year range: one statewide NASS query
+    with an API key, otherwise the local CSV county by county.
+    """
+    if api_key:
+        yield_df = fetch_and_transform_yield_state(api_key, state, start_year, end_year)
+    else:
+        frames = [fetch_and_transform_yield_csv_fallback(county, state, start_year, end_year)
+                  for county in get_counties_for_state(state)]
+        frames = [df for df in frames if df is not None and not df.empty]
+        yield_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    if yield_df is None or yield_df.empty:
+        return pd.DataFrame()
+    if crop and 'Crop' in yield_df.columns:
+        yield_df = yield_df[yield_df['Crop'] == crop]
+    return yield_df
+
+
+def missing_year_ranges_query(state, crop, start_year, end_year):
+    """
+    One SELECT returning every gap in the stored yields as
+    (state, county, crop, start_year, end_year) rows.
+
+    A calendar of the requested years (recursive CTE, portable to SQLite) is
+    crossed with the distinct stored (state, county, crop) combinations and
+    anti-joined against yields on the natural-key index; the missing years
+    are then collapsed into contiguous ranges with the year - row_number()
+    gaps-and-islands grouping.
+    """
+    calendar = select(cast(literal(start_year), Integer).label('year')).cte('calendar', recursive=True)
+    calendar = calendar.union_all(
+        select((calendar.c.year + 1).label('year')).where(calendar.c.year < end_year)
+    )
+    combos = select(Yield.state, Yield.county, Yield.crop).distinct()
+    if state:
+        combos = combos.where(Yield.state == state)
+    if crop:
+        combos = combos.where(Yield.crop == crop)
+    combos = combos.cte('combos')
+    stored = (select(Yield.id)
+              .where(Yield.state == combos.c.state, Yield.county == combos.c.county,
+                     Yield.crop == combos.c.crop, Yield.year == calendar.c.year)
+              .exists())
+    missing = (select(combos.c.state, combos.c.county, combos.c.crop, calendar.c.year,
+                      (calendar.c.year - func.row_number().over(
+                          partition_by=(combos.c.state, combos.c.county, combos.c.crop),
+                          order_by=calendar.c.year)).label('island'))
+               .select_from(combos.join(calendar, true()))
+               .where(~stored)
+               .subquery('missing'))
+    return (select(missing.c.state, missing.c.county, missing.c.crop,
+                   func.min(missing.c.year).label('start_year'), func.max(missing.c.year).label('end_year'))
+            .group_by(missing.c.state, missing.c.county, missing.c.crop, missing.c.island)
+            .order_by(missing.c.state, missing.c.county, missing.c.crop, 'start_year'))
+
+
+def plan_yield_fetches(gaps, statewide=False, statewide_min_counties=STATEWIDE_MIN_COUNTIES):
+    """
+    Merges (state, county, crop, start_year, end_year) gaps into the fewest
+    upstream fetches. Upstream queries return every crop of a county, so the
+    gaps of all crops of a county are unioned into contiguous year ranges.
+    With `statewide` (NASS API available), a state with at least
+    `statewide_min_counties` counties to fill is fetched with statewide
+    queries over the union of its gaps instead of one query per county.
+
+    Returns (state, county or None, fetch_start, fetch_end, wanted) tuples,
+    where `wanted` maps upper-cased county names to (stored spelling, set of
+    missing years) and is used to filter the fetched rows.
+    """
+    by_state = {}
+    for state_name, county, _crop, lo, hi in gaps:
+        counties = by_state.setdefault(state_name, {})
+        _, years = counties.setdefault(county.upper(), (county, set()))
+        years.update(range(lo, hi + 1))
+    fetches = []
+    for state_name, counties in by_state.items():
+        if statewide and len(counties) >= statewide_min_counties:
+            all_years = set().union(*(years for _, years in counties.values()))
+            for lo, hi in get_contiguous_ranges(sorted(all_years)):
+                fetches.append((state_name, None, lo, hi, counties))
+            continue
+        for key, (county, years) in counties.items():
+            for lo, hi in get_contiguous_ranges(sorted(years)):
+                fetches.append((state_name, county, lo, hi, {key: (county, years)}))
+    return fetches
+
+
+def _missing_rows(yield_df, wanted, crop):
+    """Keeps the fetched rows of the wanted county-years (and crop), in the stored county spelling."""
+    if yield_df is None or yield_df.empty:
+        return pd.DataFrame()
+    keys = yield_df['County'].astype(str).str.upper()
+    keep = pd.Series([
+        k in wanted and year in wanted[k][1] for k, year in zip(keys, yield_df['Year'].astype(int))
+    ], index=yield_df.index)
+    if crop and 'Crop' in yield_df.columns:
+        keep &= yield_df['Crop'] == crop
+    yield_df = yield_df[keep].copy()
+    yield_df['County'] = keys[keep].map(lambda k: wanted[k][0])
+    return yield_df
+
+
 def check_and_fetch_missing_years(state: Optional[str], crop: Optional[str], 
                                    start_year: Optional[int], end_year: Optional[int]):
     """
     Check for missing yield data in the requested year range and fetch/upsert missing data.
+    Runs as a background job (see backend/jobs.py); returns the number of fetched rows sent to the upsert.
     """
     if not start_year or not end_year:
-        return  # Can't check for missing years without a range
+        return 0  # Can't check for missing years without a range
     
+    engine = get_engine()
     with Session(engine) as session:
-        # Get all unique (county, state, crop) combinations that match the filters
-        query = select(Yield.county, Yield.state, Yield.crop).distinct()
+        has_rows_query = select(Yield.id).limit(1)
         if state:
-            query = query.where(Yield.state == state)
+            has_rows_query = has_rows_query.where(Yield.state == state)
         if crop:
-            query = query.where(Yield.crop == crop)
-        
-        combinations = session.execute(query).all()
-        
-        # No data from specified state exists, fetch all
-        if not combinations:
-            counties = get_counties_for_state(state)
-            for county in counties:
-                yield_df = fetch_and_transform_yield(
-                                api_key, county, state_name, fetch_start, fetch_end
-                            )
+            has_rows_query = has_rows_query.where(Yield.crop == crop)
+        has_rows = session.execute(has_rows_query).first() is not None
+        gaps = session.execute(missing_year_ranges_query(state, crop, start_year, end_year)).all() if has_rows else []
+
+    api_key = get_nass_api_key()
+
+    # No data from specified state exists, fetch all
+    if not has_rows:
+        if not state:
+            return 0
+        yield_df = _fetch_state_yield(state, crop, start_year, end_year, api_key)
+        upsert_yield_to_db(yield_df, engine)
+        return len(yield_df)
+
+    upserted = 0
+    for state_name, county, fetch_start, fetch_end, wanted in plan_yield_fetches(gaps, statewide=bool(api_key)):
+        try:
+            if county is None:
+                yield_df = fetch_and_transform_yield_state(api_key, state_name, fetch_start, fetch_end)
+            elif api_key:
+                yield_df = fetch_and_transform_yield(api_key, county, state_name, fetch_start, fetch_end)
+            else:
+                yield_df = fetch_and_transform_yield_csv_fallback(county, state_name, fetch_start, fetch_end)
+            yield_df = _missing_rows(yield_df, wanted, crop)
+            if not yield_df.empty:
                 upsert_yield_to_db(yield_df, engine)
-            return
-        
-        # Get NASS API key
-        api_key = get_nass_api_key()
-        use_api = bool(api_key)
-        
-        # For each combination, check which years are missing
-        for county, state_name, crop_name in combinations:
-            # Get existing years for this combination
-            year_query = select(Yield.year).where(
-                and_(
-                    Yield.county == county,
-                    Yield.state == state_name,
-                    Yield.crop == crop_name,
-                    Yield.year >= start_year,
-                    Yield.year <= end_year
-                )
-            )
-            existing_years = set(session.execute(year_query).scalars().all())
-            
-            # Determine missing years
-            all_years = set(range(start_year, end_year + 1))
-            missing_years = sorted(all_years - existing_years)
-            
-            if missing_years:
-                # Get contiguous ranges of missing years
-                missing_ranges = get_contiguous_ranges(missing_years)
-                
-                # Fetch each contiguous range separately
-                for fetch_start, fetch_end in missing_ranges:
-                    try:
-                        if use_api:
-                            yield_df = fetch_and_transform_yield(
-                                api_key, county, state_name, fetch_start, fetch_end
-                            )
-                        else:
-                            yield_df = fetch_and_transform_yield_csv_fallback(
-                                county, state_name, fetch_start, fetch_end
-                            )
-                        
-                        # Filter to only the missing years in this range and matching crop if specified
-                        if not yield_df.empty:
-                            # Filter to only missing years in this specific range
-                            range_missing_years = set(range(fetch_start, fetch_end + 1))
-                            yield_df = yield_df[yield_df['Year'].isin(range_missing_years)]
-                            # Filter by crop if we have a crop filter
-                            if crop and 'Crop' in yield_df.columns:
-                                yield_df = yield_df[yield_df['Crop'] == crop_name]
-                            
-                            if not yield_df.empty:
-                                upsert_yield_to_db(yield_df, engine)
-                    except Exception as e:
-                        # Log error but continue processing other ranges
-                        print(f"Error fetching yield data for {county}, {state_name}, {crop_name}, years {fetch_start}-{fetch_end}: {e}")
+                upserted += len(yield_df)
+        except Exception as e:
+            # Log error but continue processing other fetches
+            print(f"Error fetching yield data for {county or 'all counties'}, {state_name}, "
+                  f"years {fetch_start}-{fetch_end}: {e}")
+    return upserted
 
 @router.get("/yields/")
 def get_yields(
+    response: Response,
     state: Optional[str] = Query(None),
     crop: Optional[str] = Query(None),
     start_year: Optional[int] = Query(None),
-    end_year: Optional[int] = Query(None)
+    end_year: Optional[int] = Query(None),
+    cursor: Optional[int] = Query(None, ge=0, description="id of the last row of the previous page"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="page size (default: all rows)"),
+    fields: Optional[str] = Query(None, description="comma-separated columns, e.g. year,county,crop,value"),
+    fmt: str = Query('json', alias='format', pattern=FORMAT_PATTERN, description="json, ndjson, arrow or parquet"),
+    session: Session = Depends(get_session),
 ):
-    # Check for missing data and fetch if needed
-    check_and_fetch_missing_years(state, crop, start_year, end_year)
+    columns = parse_fields(Yield, fields)
+    # Backfill missing years in the background (first page only) and return what is stored now;
+    # the job id is sent in X-Backfill-Job, poll /jobs/{id} and re-query once it has succeeded
+    if cursor is None and start_year and end_year:
+        job = submit_job('yield_backfill',
+                         {'state': state, 'crop': crop, 'start_year': start_year, 'end_year': end_year},
+                         check_and_fetch_missing_years, state, crop, start_year, end_year)
+        response.headers[JOB_HEADER] = job['id']
     
-    with Session(engine) as session:
-        query = select(Yield)
-        if state:
-            query = query.where(Yield.state == state)
-        if crop:
-            query = query.where(Yield.crop == crop)
-        
-        if start_year:
-            query = query.where(Yield.year >= start_year)
-        if end_year:
-            query = query.where(Yield.year <= end_year)
-
-
-        results = session.execute(query).scalars().all()
-        # Convert ORM objects to dicts
-        return [
-            {
-                "id": y.id,
-                "year": y.year,
-                "state": y.state,
-                "district": y.district,
-                "county": y.county,
-                "county_ansi": y.county_ansi,
-                "crop": y.crop,
-                "value": y.value,
-                "unit": y.unit
-            }
-            for y in results
-        ]
+    query = page_query(Yield, columns, cursor, limit)
+    if state:
+        query = query.where(Yield.state == state)
+    if crop:
+        query = query.where(Yield.crop == crop)
+    
+    if start_year:
+        query = query.where(Yield.year >= start_year)
+    if end_year:
+        query = query.where(Yield.year <= end_year)
+
+    return format_response(session.execute(query, execution_options=STREAM_OPTIONS), columns, fmt, response, limit)
+
+
+@router.get("/yields/summary")
+def get_yields_summary(
+    state: Optional[str] = Query(None),
+    crop: Optional[str] = Query(None),
+    county: Optional[str] = Query(None),
+    start_year: Optional[int] = Query(None),
+    end_year: Optional[int] = Query(None),
+    group_by: Optional[str] = Query(None, description="comma-separated, from state,district,county,crop (default state,county,crop)"),
+    exclude_other: bool = Query(True, description="drop the OTHER (COMBINED) COUNTIES aggregate rows"),
+    session: Session = Depends(get_session),
+):
+    """
+    Yield statistics per group, computed in SQL: count, mean, stddev,
+    min, max and the linear trend (slope per year), plus first/last year.
+    """
+    group_columns = parse_group_by(Yield, group_by, YIELD_GROUPS, 'state,county,crop')
+    filters = []
+    if state:
+        filters.append(Yield.state == state)
+    if crop:
+        filters.append(Yield.crop == crop)
+    if county:
+        filters.append(Yield.county == county)
+    if start_year:
+        filters.append(Yield.year >= start_year)
+    if end_year:
+        filters.append(Yield.year <= end_year)
+    if exclude_other:
+        filters.append(Yield.county.not_in(EXCLUDED_COUNTIES))
+    return summarize(session, Yield, group_columns, {'': Yield.value}, filters)
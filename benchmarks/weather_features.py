@@ -0,0 +1,106 @@
+"""
+Micro-benchmark: legacy per-year weather aggregation vs the vectorized engine.
+
+The legacy path is the pre-vectorization code from fetch_and_transform_weather
+(string-joined date parsing plus one filter per year, one county at a time).
+
+Usage (from repo root):
+    python -m benchmarks.weather_features --counties 20 --years 43
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.ingest.weather_features import add_date_columns, annual_growing_season_features
+
+
+def make_daily(n_counties, start_year, end_year, seed=0):
+    """Builds synthetic Daymet-shaped daily rows (365 days/year) for n counties."""
+    rng = np.random.default_rng(seed)
+    years = np.arange(start_year, end_year + 1)
+    year_col = np.repeat(years, 365)
+    yday_col = np.tile(np.arange(1, 366), len(years))
+    frames = []
+    for i in range(n_counties):
+        n = len(year_col)
+        tmin = rng.normal(10, 8, n)
+        frames.append(pd.DataFrame({
+            'Year': year_col,
+            'DayOfYear': yday_col,
+            'tmax': tmin + rng.uniform(5, 15, n),
+            'tmin': tmin,
+            'prcp': rng.exponential(3, n),
+            'vp': rng.normal(1200, 300, n),
+            'srad': rng.normal(350, 80, n),
+            'County': f'COUNTY {i}',
+            'State': 'NORTH CAROLINA',
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def legacy(daily):
+    """The original per-county, per-year implementation."""
+    out = []
+    for (state, county), df in daily.groupby(['State', 'County']):
+        df = df.copy()
+        df['date'] = pd.to_datetime(df[['Year', 'DayOfYear']].astype(str).agg('-'.join, axis=1), format='%Y-%j')
+        df['Year'] = df['date'].dt.year
+        for year in range(int(df['Year'].min()), int(df['Year'].max()) + 1):
+            yearly_data = df[df['Year'] == year]
+            growing_season = yearly_data[yearly_data['date'].dt.month.between(5, 9)]
+            t_avg = (growing_season['tmax'] + growing_season['tmin']) / 2
+            gdd = (t_avg - 10).clip(lower=0)
+            out.append({
+                'Year': year,
+                'TotalPrecip_mm': growing_season['prcp'].sum(),
+                'AvgTemp_C': t_avg.mean(),
+                'TotalGDD': gdd.sum(),
+                'County': county,
+                'State': state,
+                'vp': growing_season['vp'].mean(),
+                'srad': growing_season['srad'].mean(),
+            })
+    return pd.DataFrame(out)
+
+
+def vectorized(daily):
+    df = add_date_columns(daily.copy())
+    return annual_growing_season_features(df)
+
+
+def _time(fn, daily, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(daily)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--counties', type=int, default=10)
+    parser.add_argument('--years', type=int, default=43)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    daily = make_daily(args.counties, 1980, 1980 + args.years - 1)
+    print(f"{len(daily):,} daily rows ({args.counties} counties x {args.years} years)")
+    t_legacy, r_legacy = _time(legacy, daily, args.repeat)
+    t_vec, r_vec = _time(vectorized, daily, args.repeat)
+
+    key = ['State', 'County', 'Year']
+    a = r_legacy.sort_values(key).reset_index(drop=True)
+    b = r_vec.sort_values(key).reset_index(drop=True)[a.columns]
+    pd.testing.assert_frame_equal(a, b, check_dtype=False)
+
+    print(f"legacy:     {t_legacy * 1000:9.1f} ms")
+    print(f"vectorized: {t_vec * 1000:9.1f} ms")
+    print(f"speedup:    {t_legacy / t_vec:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
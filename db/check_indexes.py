@@ -0,0 +1,132 @@
+"""
+Checks that the main API queries are planned as index scans.
+
+Runs EXPLAIN (Postgres) or EXPLAIN QUERY PLAN (SQLite) on the queries behind
+/yields/, /weather/, /soil/ and /dataset/ and reports, per table, which index
+the planner picked. Exits non-zero when a table is read by a full scan or
+through a different index than expected, e.g. after a migration was not
+applied.
+
+On Postgres, sequential scans are disabled for the check (SET LOCAL
+enable_seqscan = off) so small or empty development tables still show
+whether a usable index exists.
+
+Usage:
+    python db/check_indexes.py [--state IOWA] [--crop CORN] [--county STORY] [--year 2020]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import text
+
+from db.models import Base, Soil, Weather, Yield
+from backend.database import get_engine
+from backend.dataset import dataset_query
+from backend.pagination import page_query, parse_fields
+
+
+def endpoint_queries(state, crop, county, year):
+    """(name, query, {table: expected index}) for the main endpoint queries."""
+    yields = (page_query(Yield, parse_fields(Yield, None), limit=20000)
+              .where(Yield.state == state, Yield.crop == crop,
+                     Yield.year >= year - 10, Yield.year <= year))
+    weather_state = (page_query(Weather, parse_fields(Weather, None), limit=20000)
+                     .where(Weather.state == state, Weather.year == year))
+    weather_county = (page_query(Weather, parse_fields(Weather, None))
+                      .where(Weather.state == state, Weather.county == county))
+    soil = page_query(Soil, parse_fields(Soil, None)).where(Soil.state == state)
+    dataset = dataset_query(state, crop, year - 10, year)
+    return [
+        ('/yields/?state&crop&years', yields, {'yields': 'ix_yields_state_crop_year'}),
+        ('/weather/?state&year', weather_state, {'weather': 'ix_weather_state_year'}),
+        ('/weather/?state&county', weather_county, {'weather': 'uq_weather_state_county_year'}),
+        ('/soil/?state', soil, {'soil': 'uq_soil_state_county'}),
+        ('/dataset/', dataset, {
+            'yields': 'ix_yields_state_crop_year',
+            'weather': 'uq_weather_state_county_year',
+            'soil': 'uq_soil_state_county',
+        }),
+    ]
+
+
+def _declared_columns(name):
+    """Columns of the index or unique constraint `name` declared in db/models.py."""
+    for table in Base.metadata.tables.values():
+        for item in list(table.indexes) + list(table.constraints):
+            if item.name == name:
+                return [c.name for c in item.columns]
+    raise KeyError(name)
+
+
+def _sqlite_index_columns(conn, name):
+    # Unique constraints are backed by sqlite_autoindex_<table>_N, so compare columns, not names
+    return [row[2] for row in conn.exec_driver_sql(f'PRAGMA index_info("{name}")')]
+
+
+def _sqlite_access(conn, sql):
+    """{table: index name or None} from EXPLAIN QUERY PLAN."""
+    access = {}
+    for row in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}'):
+        detail = row[-1]
+        match = re.match(r'(SCAN|SEARCH) (\w+)(?: AS \w+)?(?: USING (?:COVERING )?INDEX (\w+))?', detail)
+        if match:
+            access[match.group(2)] = match.group(3)
+    return access
+
+
+def _postgres_access(conn, sql):
+    """{table: index name or None} from EXPLAIN (FORMAT JSON)."""
+    conn.execute(text('SET LOCAL enable_seqscan = off'))
+    plan = conn.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {sql}').scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    access = {}
+
+    def walk(node):
+        table = node.get('Relation Name')
+        if table and table not in access:
+            access[table] = node.get('Index Name')
+        for child in node.get('Plans', []):
+            walk(child)
+        # Bitmap heap scans name their index on the child Bitmap Index Scan
+        if node.get('Node Type') == 'Bitmap Heap Scan':
+            access[table] = next((c.get('Index Name') for c in node.get('Plans', []) if c.get('Index Name')), None)
+
+    walk(plan[0]['Plan'])
+    return access
+
+
+def check(engine, state, crop, county, year):
+    """Prints the access path of every endpoint query; returns the number of failures."""
+    failures = 0
+    access_for = _postgres_access if engine.dialect.name == 'postgresql' else _sqlite_access
+    with engine.begin() as conn:
+        for name, query, expected in endpoint_queries(state, crop, county, year):
+            sql = str(query.compile(dialect=engine.dialect, compile_kwargs={'literal_binds': True}))
+            access = access_for(conn, sql)
+            for table, index in expected.items():
+                used = access.get(table)
+                if used and engine.dialect.name == 'sqlite':
+                    ok = _sqlite_index_columns(conn, used) == _declared_columns(index)
+                else:
+                    ok = used == index
+                failures += not ok
+                print(f"{'ok  ' if ok else 'FAIL'} {name:<28} {table:<8} {used or 'full scan'}"
+                      + ('' if ok else f' (expected {index})'))
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that API queries use the expected indexes")
+    parser.add_argument('--state', default='IOWA')
+    parser.add_argument('--crop', default='CORN')
+    parser.add_argument('--county', default='STORY')
+    parser.add_argument('--year', type=int, default=2020)
+    args = parser.parse_args()
+    failed = check(get_engine(), args.state, args.crop, args.county, args.year)
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,45 @@
+"""add natural key unique constraints
+
+Revision ID: 4c1e7a9d2b30
+Revises: 822630149253
+Create Date: 2026-10-18 09:12:44.301512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c1e7a9d2b30'
+down_revision: Union[str, Sequence[str], None] = '822630149253'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+NATURAL_KEYS = {
+    'yields': ('uq_yields_state_county_year_crop', ['state', 'county', 'year', 'crop']),
+    'weather': ('uq_weather_state_county_year', ['state', 'county', 'year']),
+    'soil': ('uq_soil_state_county', ['state', 'county']),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, (name, columns) in NATURAL_KEYS.items():
+        # The old row-by-row upserts could leave duplicates behind; keep the newest row per key
+        cols = ', '.join(columns)
+        op.execute(
+            f"DELETE FROM {table} WHERE id NOT IN "
+            f"(SELECT MAX(id) FROM {table} GROUP BY {cols})"
+        )
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.create_unique_constraint(name, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, (name, _) in NATURAL_KEYS.items():
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_constraint(name, type_='unique')
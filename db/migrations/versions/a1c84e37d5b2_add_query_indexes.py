@@ -0,0 +1,39 @@
+"""add query indexes
+
+Revision ID: a1c84e37d5b2
+Revises: 6f08d2c4a9e1
+Create Date: 2026-10-18 21:03:17.552804
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c84e37d5b2'
+down_revision: Union[str, Sequence[str], None] = '6f08d2c4a9e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# The natural-key unique constraints (4c1e7a9d2b30) already index
+# yields (state, county, year, crop), weather (state, county, year) and
+# soil (state, county); these cover the filters that skip the county column.
+QUERY_INDEXES = {
+    'ix_yields_state_crop_year': ('yields', ['state', 'crop', 'year']),
+    'ix_weather_state_year': ('weather', ['state', 'year']),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, (table, columns) in QUERY_INDEXES.items():
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, (table, _) in QUERY_INDEXES.items():
+        op.drop_index(name, table_name=table)
@@ -1,10 +1,16 @@
-from sqlalchemy import Column, Integer, String, Float
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
 
 class Yield(Base):
     __tablename__ = 'yields'
+    # Natural key used by the bulk upserts in backend/ingest/runner.py
+    __table_args__ = (
+        UniqueConstraint('state', 'county', 'year', 'crop', name='uq_yields_state_county_year_crop'),
+        # /yields/ and /dataset/ filter by state and crop over a year range
+        Index('ix_yields_state_crop_year', 'state', 'crop', 'year'),
+    )
     id = Column(Integer, primary_key=True)
     # Basic columns
     year = Column(Integer, nullable=False)
@@ -22,6 +28,11 @@ class Yield(Base):
 
 class Weather(Base):
     __tablename__ = 'weather'
+    __table_args__ = (
+        UniqueConstraint('state', 'county', 'year', name='uq_weather_state_county_year'),
+        # /weather/?state=..&year=.. without a county
+        Index('ix_weather_state_year', 'state', 'year'),
+    )
     id = Column(Integer, primary_key=True)
     # Spatial columns
     county = Column(String, nullable=False)
@@ -37,6 +48,9 @@ class Weather(Base):
 
 class Soil(Base):
     __tablename__ = 'soil'
+    __table_args__ = (
+        UniqueConstraint('state', 'county', name='uq_soil_state_county'),
+    )
     id = Column(Integer, primary_key=True)
     # Spatial columns
     county = Column(String, nullable=False)
@@ -46,4 +60,57 @@ class Soil(Base):
     organic_matter = Column(Float, nullable=True)
     sand_pct = Column(Float, nullable=True)
     clay_pct = Column(Float, nullable=True)
-    # Add more soil properties as needed
\ No newline at end of file
+    # Add more soil properties as needed
+
+class County(Base):
+    __tablename__ = 'counties'
+    # Local copy of the SDM sacatalog survey-area geometry, see backend/ingest/counties.py
+    __table_args__ = (
+        UniqueConstraint('state', 'county', name='uq_counties_state_county'),
+    )
+    id = Column(Integer, primary_key=True)
+    # Spatial columns
+    county = Column(String, nullable=False)
+    state = Column(String, nullable=False)
+    areasymbol = Column(String, nullable=True)  # SSURGO survey area symbol, e.g. NC183
+    # Bounding box and centroid (WGS84 degrees)
+    min_lon = Column(Float, nullable=False)
+    min_lat = Column(Float, nullable=False)
+    max_lon = Column(Float, nullable=False)
+    max_lat = Column(Float, nullable=False)
+    center_lon = Column(Float, nullable=False)
+    center_lat = Column(Float, nullable=False)
+
+class IngestManifest(Base):
+    __tablename__ = 'ingest_manifest'
+    # One row per ingestion unit of work, see backend/ingest/manifest.py
+    __table_args__ = (
+        UniqueConstraint('source', 'state', 'county', 'start_year', 'end_year', name='uq_ingest_manifest_unit'),
+    )
+    id = Column(Integer, primary_key=True)
+    source = Column(String, nullable=False)      # soil, weather, yield
+    state = Column(String, nullable=False)
+    county = Column(String, nullable=False)      # '*' for statewide units
+    start_year = Column(Integer, nullable=False)
+    end_year = Column(Integer, nullable=False)
+    # Run bookkeeping
+    status = Column(String, nullable=False)      # running, success, failed
+    row_count = Column(Integer, nullable=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    duration_s = Column(Float, nullable=True)
+    content_hash = Column(String, nullable=True)  # sha256 of the rows written
+    error = Column(String, nullable=True)
+
+class IngestWatermark(Base):
+    __tablename__ = 'ingest_watermarks'
+    # Latest year ingested per source/county, drives incremental ingestion
+    __table_args__ = (
+        UniqueConstraint('source', 'state', 'county', name='uq_ingest_watermarks_source_state_county'),
+    )
+    id = Column(Integer, primary_key=True)
+    source = Column(String, nullable=False)      # weather, yield
+    state = Column(String, nullable=False)
+    county = Column(String, nullable=False)      # '*' for statewide fetches
+    last_year = Column(Integer, nullable=False)
+    updated_at = Column(DateTime, nullable=True)
@@ -4,7 +4,7 @@ import pandas as pd
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
-from src.utils.db_access import get_yield_data, get_weather_data, get_soil_data
+from src.utils.db_access import get_yield_data, get_dataset
 
 st.set_page_config(page_title="Select Data", page_icon="🔎")
 st.title("Select Data for Modeling")
@@ -45,7 +45,7 @@ end_year = 2024
 default_crops = ["SOYBEANS", "CORN", "WHEAT", "COTTON", "PEANUTS"]
 try:
     # Try to fetch yield rows for the chosen state and extract unique crop names.
-    yield_rows_for_state = get_yield_data(state=state_name)
+    yield_rows_for_state = get_yield_data(state=state_name, fields=['crop'])
     if not yield_rows_for_state.empty and 'crop' in yield_rows_for_state.columns:
         # Normalize crop names to uppercase strings and sort them for display
         crops = sorted(
@@ -74,92 +74,34 @@ if st.button("Load data"):
 
     st.text(f"Getting data for {crop} in {state_name} ({start_year}-{end_year})")
 
-    # Fetch from backend API
-    yield_data = get_yield_data(state=state_name, crop=crop)
-    soil_data_df = get_soil_data(state=state_name)
-    weather_data_df = get_weather_data(state=state_name)
+    # The backend joins yield, weather and soil for the selected crop, state and years
+    # and drops the OTHER (COMBINED) COUNTIES rows
+    merged, diagnostics = get_dataset(state=state_name, crop=crop, start_year=start_year, end_year=end_year)
 
     # Data integrity/diagnostics section
     st.subheader("Data Diagnostics & Integrity Checks")
-    st.write(f"Yield rows: {len(yield_data)}")
-    st.write(f"Soil rows: {len(soil_data_df)}")
-    st.write(f"Weather rows: {len(weather_data_df)}")
-    st.write("Sample yield data:")
-    st.dataframe(yield_data.head())
-    st.dataframe(yield_data.tail())
-    st.write("Sample soil data:")
-    st.dataframe(soil_data_df.head())
-    st.write("Sample weather data:")
-    st.dataframe(weather_data_df.head())
-
-    # Merge yield and weather data on Year and County
-    if 'year' in yield_data.columns and 'county' in yield_data.columns and \
-        'year' in weather_data_df.columns and 'county' in weather_data_df.columns and \
-        'county' in soil_data_df.columns:
-
-        # Drop id columns to avoid merge conflicts
-        if 'id' in yield_data.columns:
-            yield_data = yield_data.drop(columns=['id'])
-        if 'id' in weather_data_df.columns:
-            weather_data_df = weather_data_df.drop(columns=['id'])
-        if 'id' in soil_data_df.columns:
-            soil_data_df = soil_data_df.drop(columns=['id'])
-
-            
-
-
-        merged = pd.merge(yield_data, weather_data_df, on=['year', 'county'], how='left', indicator=True)
-        # drop state_y
-        if 'state_y' in merged.columns:
-            merged = merged.drop(columns=['state_y'])
-        # rename state_x to state
-        if 'state_x' in merged.columns:
-            merged = merged.rename(columns={'state_x': 'state'})
-
-        # 
-        missing_weather = merged[merged['_merge'] == 'left_only']
-        st.write(f"Rows in yield data with no weather match: {len(missing_weather)}")
-        if not missing_weather.empty:
-            st.dataframe(missing_weather)
-
-        merged = merged.drop(columns=['_merge'])
-        merged = pd.merge(merged, soil_data_df, on=['county'], how='left', indicator=True)
-            # drop state_y
-        if 'state_y' in merged.columns:
-            merged = merged.drop(columns=['state_y'])
-        # rename state_x to state
-        if 'state_x' in merged.columns:
-            merged = merged.rename(columns={'state_x': 'state'})
-
-        missing_soil = merged[merged['_merge'] == 'left_only']
-        st.write(f"Rows in yield data with no soil match: {len(missing_soil)}")
-        if not missing_soil.empty:
-            st.dataframe(missing_soil)
-        
-        merged = merged.drop(columns=['_merge'])
-
-        # Rename value to Yield
-        if 'value' in merged.columns:
-            merged = merged.rename(columns={'value': 'yield'})
-        
-        merged = merged[merged["county"] != "OTHER (COMBINED) COUNTIES"]
-        merged = merged[merged["county"] != "OTHER COUNTIES"]
-        
-
+    st.write(f"Yield rows: {diagnostics.get('yield_rows', len(merged))}")
+    st.write(f"Excluded OTHER COUNTIES rows: {diagnostics.get('excluded_rows', 0)}")
+    st.write(f"Rows in yield data with no weather match: {diagnostics.get('missing_weather', 0)}")
+    missing_weather = merged[merged['avg_temp'].isna()] if 'avg_temp' in merged.columns else merged.iloc[0:0]
+    if not missing_weather.empty:
+        st.dataframe(missing_weather)
+    st.write(f"Rows in yield data with no soil match: {diagnostics.get('missing_soil', 0)}")
+    missing_soil = merged[merged['ph'].isna()] if 'ph' in merged.columns else merged.iloc[0:0]
+    if not missing_soil.empty:
+        st.dataframe(missing_soil)
+
+    if merged.empty:
+        st.warning("No yield data found for the selected crop, state and years.")
+    else:
         st.write(f"""Counties: {merged["county"].unique().tolist()}""")
-        
-        
+
         st.session_state['df'] = merged
-        
+
         # Store the selected filters in session state
         st.session_state['selected_crop'] = crop
         st.session_state['selected_year_range'] = (start_year, end_year)
-    else:
-        st.warning("Could not merge yield and weather data: missing columns.")
 
     st.subheader("Merged Data Sample")
     if 'df' in st.session_state:
         st.dataframe(st.session_state['df'].head())
-
-
-
@@ -1,28 +1,95 @@
+import json
+from collections import OrderedDict
+
 import requests
 import pandas as pd
+import pyarrow as pa
+
+API_URL = 'http://api:8000'
+# Rows per request when paging through large results
+PAGE_SIZE = 20000
+# Responses kept for If-None-Match revalidation across Streamlit reruns
+ETAG_CACHE_SIZE = 32
+
+_etag_cache = OrderedDict()
+
+
+def _get(path, params):
+    """
+    GET returning (content, headers). Repeats of a cached request are sent
+    with If-None-Match; on 304 the stored body is reused instead of downloaded.
+    """
+    key = (path, tuple(sorted(params.items())))
+    cached = _etag_cache.get(key)
+    headers = {'If-None-Match': cached[0]} if cached else {}
+    resp = requests.get(f'{API_URL}{path}', params=params, headers=headers)
+    if resp.status_code == 304 and cached:
+        _etag_cache.move_to_end(key)
+        return cached[1], cached[2]
+    resp.raise_for_status()
+    etag = resp.headers.get('ETag')
+    if etag:
+        _etag_cache[key] = (etag, resp.content, resp.headers)
+        _etag_cache.move_to_end(key)
+        while len(_etag_cache) > ETAG_CACHE_SIZE:
+            _etag_cache.popitem(last=False)
+    return resp.content, resp.headers
+
+
+def _read_arrow(content):
+    """Decodes an Arrow IPC stream body without copying the buffer."""
+    with pa.ipc.open_stream(pa.py_buffer(content)) as reader:
+        return reader.read_all()
 
 
-def get_yield_data(state=None, crop=None, start_year=None, end_year=None):
+def _get_pages(path, params, fields=None, page_size=PAGE_SIZE):
+    """
+    Fetches every page of a keyset-paginated endpoint as Arrow, following
+    X-Next-Cursor, and converts the concatenated pages to one DataFrame.
+    """
+    params = dict(params, limit=page_size, format='arrow')
+    if fields:
+        params['fields'] = ','.join(fields)
+    tables = []
+    while True:
+        content, headers = _get(path, params)
+        tables.append(_read_arrow(content))
+        cursor = headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+        params['cursor'] = cursor
+    return pa.concat_tables(tables).to_pandas()
+
+
+def get_yield_data(state=None, crop=None, start_year=None, end_year=None, fields=None):
     params = {}
     if state: params['state'] = str.upper(state)
     if crop: params['crop'] = str.upper(crop)
     if start_year: params['start_year'] = start_year
     if end_year: params['end_year'] = end_year
-    resp = requests.get('http://api:8000/yields/', params=params)
-    data = resp.json()
-    return pd.DataFrame(data)
+    return _get_pages('/yields/', params, fields)
 
-def get_weather_data(state=None, year=None):
+def get_weather_data(state=None, year=None, fields=None):
     params = {}
     if state: params['state'] = str.upper(state)
     if year: params['year'] = year
-    resp = requests.get('http://api:8000/weather/', params=params)
-    data = resp.json()
-    return pd.DataFrame(data)
+    return _get_pages('/weather/', params, fields)
 
-def get_soil_data(state=None):
+def get_soil_data(state=None, fields=None):
     params = {}
     if state: params['state'] = str.upper(state)
-    resp = requests.get('http://api:8000/soil/', params=params)
-    data = resp.json()
-    return pd.DataFrame(data)
+    return _get_pages('/soil/', params, fields)
+
+def get_dataset(state=None, crop=None, start_year=None, end_year=None):
+    """
+    Fetches the server-side joined yield/weather/soil modeling table.
+    Returns (DataFrame, diagnostics dict).
+    """
+    params = {'format': 'arrow'}
+    if state: params['state'] = str.upper(state)
+    if crop: params['crop'] = str.upper(crop)
+    if start_year: params['start_year'] = start_year
+    if end_year: params['end_year'] = end_year
+    content, headers = _get('/dataset/', params)
+    diagnostics = json.loads(headers.get('X-Dataset-Diagnostics', '{}'))
+    return _read_arrow(content).to_pandas(), diagnostics